@@ -0,0 +1,155 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from rl.utils import LOGGER
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from worldle.api import games
+from worldle.api.auth import UserClientIdentity, resolve_user_client_async
+from worldle.api.interfaces import (
+    GameCreate,
+    GameRead,
+    GuessBatchCreate,
+    GuessCreate,
+    GuessRead,
+)
+from worldle.api.responses import fast_json
+from worldle.db.session import get_async_session
+from worldle.utils.cache import COUNTRY_DATA_CHECK_INTERVAL, refresh_country_data
+from worldle.utils.stats import UserStats, get_user_stats
+
+router = APIRouter()
+
+
+async def refresh_country_data_periodically() -> None:
+    """Keep the country data caches current from a thread, off the event loop."""
+    while True:
+        await asyncio.sleep(COUNTRY_DATA_CHECK_INTERVAL)
+        try:
+            await asyncio.to_thread(refresh_country_data)
+        except Exception:
+            LOGGER.exception("Couldn't refresh country data")
+
+
+# region Dependencies
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    session = get_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_user_client(
+    db: Annotated[AsyncSession, Depends(get_db)], user_client_uuid: str
+) -> UserClientIdentity:
+    user_client = await resolve_user_client_async(db, user_client_uuid)
+    if not user_client:
+        raise HTTPException(status_code=404, detail="User client not found")
+    return user_client
+
+
+async def get_authed_user_client(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    x_worldle_user_client_uuid: str | None = Header(None),
+) -> UserClientIdentity:
+    if not x_worldle_user_client_uuid:
+        raise HTTPException(
+            status_code=401, detail="X-Worldle-User-Client-Uuid header is required"
+        )
+
+    user_client = await resolve_user_client_async(db, x_worldle_user_client_uuid)
+    if not user_client:
+        raise HTTPException(status_code=404, detail="User client not found")
+    return user_client
+
+
+# endregion
+
+
+@router.get(
+    "/user_clients/{user_client_uuid}/current_game",
+    response_model=GameRead | None,
+    operation_id="readCurrentGame",
+)
+async def read_current_game(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_user_client)],
+):
+    return fast_json(await db.run_sync(games.read_current_game, user_client.id))
+
+
+@router.get(
+    "/user_clients/{user_client_uuid}/stats",
+    response_model=UserStats,
+    operation_id="readUserStats",
+)
+async def read_user_stats(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_user_client)],
+):
+    return fast_json(
+        await db.run_sync(lambda session: get_user_stats(user_client.id, session))
+    )
+
+
+@router.post(
+    "/games",
+    response_model=GameRead,
+    operation_id="createGame",
+)
+async def create_game(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
+    game_create: GameCreate,
+):
+    return fast_json(await db.run_sync(games.create_game, user_client.id, game_create))
+
+
+@router.get(
+    "/games/{game_id}",
+    response_model=GameRead,
+    operation_id="readGame",
+)
+async def read_game(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
+    game_id: int,
+):
+    return fast_json(await db.run_sync(games.read_game, user_client.id, game_id))
+
+
+@router.post(
+    "/games/{game_id}/guesses",
+    response_model=GuessRead,
+    operation_id="createGuess",
+)
+async def create_guess(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
+    game_id: int,
+    guess_create: GuessCreate,
+):
+    return fast_json(
+        await db.run_sync(games.create_guess, user_client.id, game_id, guess_create)
+    )
+
+
+@router.post(
+    "/games/{game_id}/guesses/batch",
+    response_model=GameRead,
+    operation_id="createGuessBatch",
+)
+async def create_guess_batch(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
+    game_id: int,
+    guess_batch: GuessBatchCreate,
+):
+    return fast_json(
+        await db.run_sync(games.create_guesses, user_client.id, game_id, guess_batch)
+    )
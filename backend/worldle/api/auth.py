@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import hmac
+from dataclasses import dataclass
+
+import rl.utils.io
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from worldle.db.models import UserClient
+from worldle.utils.cache import TTLCache
+
+
+@dataclass(frozen=True, slots=True)
+class UserClientIdentity:
+    """The parts of a user client that request handlers need."""
+
+    id: int
+    uuid: str
+
+
+# Per-worker cache of uuid -> identity, where None records an unknown uuid
+_IDENTITY_CACHE: TTLCache[str, UserClientIdentity | None] = TTLCache(
+    maxsize=int(rl.utils.io.getenv("WORLDLE_USER_CLIENT_CACHE_SIZE", "100000")),
+    ttl=float(rl.utils.io.getenv("WORLDLE_USER_CLIENT_CACHE_TTL", "3600")),
+)
+# Unknown uuids are only remembered briefly, in case the client is created later
+_UNKNOWN_UUID_TTL = float(rl.utils.io.getenv("WORLDLE_UNKNOWN_USER_CLIENT_TTL", "30"))
+_NOT_CACHED = object()
+
+
+def _parse_token_keys(value: str) -> dict[str, bytes]:
+    keys: dict[str, bytes] = {}
+    for entry in filter(None, (e.strip() for e in value.split(","))):
+        key_id, sep, secret = entry.partition(":")
+        if not sep or not key_id or not secret or "." in key_id:
+            raise ValueError(
+                "WORLDLE_USER_CLIENT_TOKEN_KEYS must look like 'kid:secret,...' "
+                "with no dots in key ids"
+            )
+        keys[key_id] = secret.encode()
+    return keys
+
+
+# Signing keys for user client tokens as "kid:secret,...". The first key signs new
+# tokens and all of them verify, so keys can be rotated by prepending a new one.
+# Without keys, new clients are issued bare uuids.
+_TOKEN_KEYS = _parse_token_keys(
+    rl.utils.io.getenv("WORLDLE_USER_CLIENT_TOKEN_KEYS", "")
+)
+_SIGNING_KEY_ID = next(iter(_TOKEN_KEYS), None)
+
+
+def _sign(key_id: str, user_client_id: int, user_client_uuid: str) -> str:
+    message = f"{key_id}.{user_client_id}.{user_client_uuid}".encode()
+    digest = hmac.new(_TOKEN_KEYS[key_id], message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def issue_token(identity: UserClientIdentity) -> str:
+    """The credential to hand out for a user client.
+
+    This is a signed "kid.id.uuid.signature" token when signing keys are
+    configured, so later requests can be authenticated without a query, and the
+    bare uuid otherwise.
+    """
+    if _SIGNING_KEY_ID is None:
+        return identity.uuid
+    signature = _sign(_SIGNING_KEY_ID, identity.id, identity.uuid)
+    return f"{_SIGNING_KEY_ID}.{identity.id}.{identity.uuid}.{signature}"
+
+
+def verify_token(token: str) -> UserClientIdentity | None:
+    """The identity a signed token was issued for, or None if it doesn't verify."""
+    parts = token.split(".")
+    if len(parts) != 4:
+        return None
+    key_id, user_client_id, user_client_uuid, signature = parts
+    if key_id not in _TOKEN_KEYS or not user_client_id.isdigit():
+        return None
+    expected = _sign(key_id, int(user_client_id), user_client_uuid)
+    if not hmac.compare_digest(signature, expected):
+        return None
+    return UserClientIdentity(id=int(user_client_id), uuid=user_client_uuid)
+
+
+def _is_token(user_client_uuid: str) -> bool:
+    # Bare uuids never contain dots
+    return "." in user_client_uuid
+
+
+def _identity_query(user_client_uuid: str):
+    return select(UserClient.id, UserClient.uuid).where(
+        UserClient.uuid == user_client_uuid
+    )
+
+
+def _remember(
+    user_client_uuid: str, identity: UserClientIdentity | None
+) -> UserClientIdentity | None:
+    _IDENTITY_CACHE.set(
+        user_client_uuid, identity, ttl=None if identity else _UNKNOWN_UUID_TTL
+    )
+    return identity
+
+
+def remember_user_client(user_client: UserClient) -> UserClientIdentity:
+    identity = UserClientIdentity(id=user_client.id, uuid=user_client.uuid)
+    _remember(user_client.uuid, identity)
+    return identity
+
+
+def resolve_user_client(
+    session: Session, user_client_uuid: str
+) -> UserClientIdentity | None:
+    """Resolve a signed token or a bare uuid to the user client's identity."""
+    if _is_token(user_client_uuid):
+        return verify_token(user_client_uuid)
+    cached = _IDENTITY_CACHE.get(user_client_uuid, _NOT_CACHED)
+    if cached is not _NOT_CACHED:
+        return cached
+    row = session.execute(_identity_query(user_client_uuid)).one_or_none()
+    return _remember(user_client_uuid, UserClientIdentity(*row) if row else None)
+
+
+async def resolve_user_client_async(
+    session: AsyncSession, user_client_uuid: str
+) -> UserClientIdentity | None:
+    if _is_token(user_client_uuid):
+        return verify_token(user_client_uuid)
+    cached = _IDENTITY_CACHE.get(user_client_uuid, _NOT_CACHED)
+    if cached is not _NOT_CACHED:
+        return cached
+    row = (await session.execute(_identity_query(user_client_uuid))).one_or_none()
+    return _remember(user_client_uuid, UserClientIdentity(*row) if row else None)
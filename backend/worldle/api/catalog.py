@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+
+import brotli
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session, defer
+
+from worldle.api.interfaces import CountryItem, CountryRead
+from worldle.db.models import Country
+from worldle.utils.cache import CountryDataCache
+from worldle.utils.snapshot import Snapshot, SnapshotWriter
+
+_COUNTRY_ITEMS_ADAPTER = TypeAdapter(list[CountryItem])
+
+_CACHE_CONTROL = "public, max-age=86400"  # Cache for 24 hours
+# Content codings we precompress, in order of preference
+_ENCODINGS = ("br", "gzip")
+
+
+def _choose_encoding(accept_encoding: str | None) -> str | None:
+    accepted: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in _ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+@dataclass(frozen=True)
+class CatalogBody:
+    """A JSON body with its content hash and variants compressed ahead of time.
+
+    Bodies loaded from a snapshot are memoryviews into the shared mapping.
+    """
+
+    content: bytes | memoryview
+    content_hash: str
+    compressed: dict[str, bytes | memoryview]
+
+    @classmethod
+    def from_content(cls, content: bytes) -> CatalogBody:
+        return cls(
+            content=content,
+            content_hash=hashlib.sha1(content).hexdigest(),
+            compressed={
+                "br": brotli.compress(content, quality=11),
+                "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+            },
+        )
+
+    def etag(self, encoding: str | None) -> str:
+        # Strong ETags have to differ between content codings of the same body
+        return (
+            f'"{self.content_hash}-{encoding}"'
+            if encoding
+            else f'"{self.content_hash}"'
+        )
+
+    def _matches(self, if_none_match: str) -> bool:
+        for tag in if_none_match.split(","):
+            tag = tag.strip().removeprefix("W/").strip('"')
+            if tag == "*" or tag.split("-", 1)[0] == self.content_hash:
+                return True
+        return False
+
+    def to_response(
+        self, request: Request, cache_control: str = _CACHE_CONTROL
+    ) -> Response:
+        encoding = _choose_encoding(request.headers.get("accept-encoding"))
+        headers = {
+            "Cache-Control": cache_control,
+            "ETag": self.etag(encoding),
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=self.compressed[encoding] if encoding else self.content,
+            media_type="application/json",
+            headers=headers,
+        )
+
+
+@dataclass(frozen=True)
+class CountryCatalog:
+    """Every country, both as API models and as ready-to-send JSON bodies."""
+
+    items: dict[int, CountryItem]
+    list_body: CatalogBody
+    country_bodies: dict[int, CatalogBody]
+
+
+def build_country_catalog(session: Session) -> CountryCatalog:
+    countries = session.scalars(
+        select(Country)
+        .options(defer(Country.geometry), defer(Country.geo_point))
+        .order_by(Country.name.asc())
+    ).all()
+    items = [CountryItem.model_validate(c) for c in countries]
+    return CountryCatalog(
+        items={item.id: item for item in items},
+        list_body=CatalogBody.from_content(_COUNTRY_ITEMS_ADAPTER.dump_json(items)),
+        country_bodies={
+            c.id: CatalogBody.from_content(
+                CountryRead.model_validate(c).model_dump_json().encode()
+            )
+            for c in countries
+        },
+    )
+
+
+def _write_body(writer: SnapshotWriter, key: str, body: CatalogBody) -> None:
+    writer.meta["catalog"]["hashes"][key] = body.content_hash
+    writer.add_body(key, body.content)
+    for encoding, compressed in body.compressed.items():
+        writer.add_body(f"{key}.{encoding}", compressed)
+
+
+def write_country_catalog(catalog: CountryCatalog, writer: SnapshotWriter) -> None:
+    writer.meta["catalog"] = {
+        "items": _COUNTRY_ITEMS_ADAPTER.dump_python(
+            list(catalog.items.values()), mode="json"
+        ),
+        "hashes": {},
+    }
+    _write_body(writer, "countries", catalog.list_body)
+    for country_id, body in catalog.country_bodies.items():
+        _write_body(writer, f"countries/{country_id}", body)
+
+
+def _read_body(snapshot: Snapshot, key: str) -> CatalogBody:
+    return CatalogBody(
+        content=snapshot.body(key),
+        content_hash=snapshot.meta["catalog"]["hashes"][key],
+        compressed={
+            encoding: snapshot.body(f"{key}.{encoding}") for encoding in _ENCODINGS
+        },
+    )
+
+
+def read_country_catalog(snapshot: Snapshot) -> CountryCatalog:
+    items = _COUNTRY_ITEMS_ADAPTER.validate_python(snapshot.meta["catalog"]["items"])
+    return CountryCatalog(
+        items={item.id: item for item in items},
+        list_body=_read_body(snapshot, "countries"),
+        country_bodies={
+            item.id: _read_body(snapshot, f"countries/{item.id}") for item in items
+        },
+    )
+
+
+_COUNTRY_CATALOG = CountryDataCache(
+    build_country_catalog, from_snapshot=read_country_catalog
+)
+
+
+def get_country_catalog() -> CountryCatalog:
+    return _COUNTRY_CATALOG.get()
@@ -0,0 +1,400 @@
+# Operations take a sync Session and return API models so that the async handlers
+# can run them unchanged through AsyncSession.run_sync.
+
+import datetime
+
+import rl.utils.io
+from fastapi import HTTPException
+from sqlalchemy import Insert, Result, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from worldle.api.catalog import CountryCatalog, get_country_catalog
+from worldle.api.interfaces import (
+    GameCreate,
+    GameRead,
+    GuessBatchCreate,
+    GuessCreate,
+    GuessItem,
+    GuessRead,
+)
+from worldle.db.models import Game, GameStatus, Guess
+from worldle.utils.answers import daily_mode_enabled, get_answer_pool
+from worldle.utils.game import MAX_GUESSES, CompassDirection, GameMode
+from worldle.utils.geo import get_pair_matrix
+from worldle.utils.stats import lock_user_stats
+
+# Don't give a player any of the answers from their last N games
+_RECENT_ANSWER_WINDOW = int(rl.utils.io.getenv("WORLDLE_RECENT_ANSWER_WINDOW", "20"))
+
+# Everything GameRead serializes: the game and answer in one statement, and the
+# guesses with their countries in a second. Guess.game comes from the identity map.
+_GAME_READ_OPTIONS = (
+    joinedload(Game.answer_country),
+    selectinload(Game.guesses).joinedload(Guess.guessed_country),
+)
+
+
+def read_current_game(session: Session, user_client_id: int) -> GameRead | None:
+    game = session.scalar(
+        select(Game)
+        .where(Game.user_client_id == user_client_id)
+        .where(Game.status == GameStatus.IN_PROGRESS)
+        .order_by(Game.created_at.desc())
+        .limit(1)
+        .options(*_GAME_READ_OPTIONS)
+    )
+    return GameRead.model_validate(game) if game else None
+
+
+def create_game(
+    session: Session, user_client_id: int, game_create: GameCreate
+) -> GameRead:
+    # Refused before the active game is abandoned
+    if game_create.mode == GameMode.DAILY and not daily_mode_enabled():
+        raise HTTPException(status_code=503, detail="Daily games are not available")
+
+    # Locked like _lock_game does before a guess, and before the stats row, so the
+    # two can't both finish the game or take the locks in opposite orders. Under
+    # READ COMMITTED a game finished while we waited no longer matches the WHERE.
+    active_game = session.scalar(
+        select(Game)
+        .where(Game.user_client_id == user_client_id)
+        .where(Game.status == GameStatus.IN_PROGRESS)
+        .options(selectinload(Game.guesses).load_only(Guess.id))
+        .with_for_update(of=Game)
+    )
+    if active_game:
+        # TODO: Should we do this here or require a separate API call first?
+        if active_game.guesses:
+            lock_user_stats(user_client_id, session).record_game(
+                GameStatus.ABANDONED, len(active_game.guesses)
+            )
+        active_game.status = GameStatus.ABANDONED
+
+    answer_pool = get_answer_pool(session)
+    if game_create.mode == GameMode.DAILY:
+        answer_country_id = answer_pool.daily_answer(
+            datetime.datetime.now(datetime.UTC).date()
+        )
+    else:
+        recent_answer_ids = session.scalars(
+            select(Game.answer_country_id)
+            .where(Game.user_client_id == user_client_id)
+            .order_by(Game.created_at.desc())
+            .limit(_RECENT_ANSWER_WINDOW)
+        ).all()
+        answer_country_id = answer_pool.sample(exclude=set(recent_answer_ids))
+
+    game = Game(
+        user_client_id=user_client_id,
+        answer_country_id=answer_country_id,
+        status=GameStatus.IN_PROGRESS,
+    )
+    session.add(game)
+    session.flush()
+    # A new game has no guesses, so the response needs nothing reloaded
+    game_read = GameRead(
+        id=game.id,
+        user_client_id=user_client_id,
+        answer_country_id=answer_country_id,
+        status=GameStatus.IN_PROGRESS,
+        answer_country=get_country_catalog().items[answer_country_id],
+        guesses=[],
+    )
+    session.commit()
+    return game_read
+
+
+def _get_user_game(session: Session, user_client_id: int, game_id: int) -> Game:
+    game = session.get(Game, game_id, options=_GAME_READ_OPTIONS)
+    if not game or game.user_client_id != user_client_id:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return game
+
+
+def read_game(session: Session, user_client_id: int, game_id: int) -> GameRead:
+    return GameRead.model_validate(_get_user_game(session, user_client_id, game_id))
+
+
+def _guess_metrics(guessed_country_id: int, answer_country_id: int) -> dict:
+    matrix = get_pair_matrix(guessed_country_id, answer_country_id)
+    if guessed_country_id not in matrix:
+        # Countries without a location can't be guessed
+        raise HTTPException(status_code=404, detail="Country not found")
+    if answer_country_id not in matrix:
+        raise HTTPException(status_code=409, detail="Game's answer has no location")
+    pair = guessed_country_id, answer_country_id
+    return {
+        "distance_km": matrix.distance_km(*pair),
+        "distance_miles": matrix.distance_miles(*pair),
+        "bearing": matrix.bearing_degrees(*pair),
+        "compass_direction": matrix.compass_direction(*pair),
+        "proximity": matrix.proximity_prop(*pair),
+    }
+
+
+def _guess_item(
+    catalog: CountryCatalog,
+    answer_country_id: int,
+    guess_id: int,
+    guessed_country_id: int,
+    index: int,
+    metrics: dict,
+) -> GuessItem:
+    return GuessItem(
+        id=guess_id,
+        guessed_country_id=guessed_country_id,
+        guessed_country=catalog.items[guessed_country_id],
+        index=index,
+        is_correct=guessed_country_id == answer_country_id,
+        distance_to_answer_miles=metrics["distance_miles"],
+        distance_to_answer_km=metrics["distance_km"],
+        bearing_to_answer=metrics["bearing"],
+        compass_direction_to_answer=CompassDirection(metrics["compass_direction"]),
+        proximity_prop=metrics["proximity"],
+    )
+
+
+def _lock_game(session: Session, user_client_id: int, game_id: int) -> tuple:
+    """Lock a game row, then read its guesses.
+
+    The guesses are read in a second statement so that, under READ COMMITTED, they
+    come from a snapshot taken after the lock is granted and include every guess
+    committed by whoever held it. Concurrent guesses on a game are serialized by
+    the lock. Returns the answer country id, the status and the guess rows in order.
+    """
+    game = session.execute(
+        select(Game.user_client_id, Game.answer_country_id, Game.status)
+        .where(Game.id == game_id)
+        .with_for_update()
+    ).one_or_none()
+    if not game or game.user_client_id != user_client_id:
+        raise HTTPException(status_code=404, detail="Game not found")
+    previous_guesses = session.execute(
+        select(
+            Guess.id,
+            Guess.guessed_country_id,
+            Guess.index,
+            Guess.distance_km,
+            Guess.distance_miles,
+            Guess.bearing,
+            Guess.compass_direction,
+            Guess.proximity,
+        )
+        .where(Guess.game_id == game_id)
+        .order_by(Guess.index)
+    ).all()
+    return game.answer_country_id, game.status, previous_guesses
+
+
+def _insert_guesses(session: Session, statement: Insert) -> Result:
+    """Execute an INSERT of guesses, answering a conflicting index with a 409."""
+    try:
+        return session.execute(statement)
+    except IntegrityError as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=409, detail="Guess conflicts with the game's guesses"
+        ) from e
+
+
+def _stored_guess_items(
+    catalog: CountryCatalog, answer_country_id: int, rows: list
+) -> list[GuessItem]:
+    return [
+        _guess_item(
+            catalog,
+            answer_country_id,
+            row.id,
+            row.guessed_country_id,
+            row.index,
+            # Guesses from before metrics were stored have them computed instead
+            row._asdict()
+            if row.distance_km is not None
+            else _guess_metrics(row.guessed_country_id, answer_country_id),
+        )
+        for row in rows
+    ]
+
+
+def _final_status(
+    guessed_country_id: int, answer_country_id: int, guess_count: int
+) -> GameStatus | None:
+    """The status a game ends with after its guess_count-th guess, if it ends."""
+    if guessed_country_id == answer_country_id:
+        return GameStatus.WON
+    if guess_count == MAX_GUESSES:
+        return GameStatus.LOST
+    return None
+
+
+def _finish_game(
+    session: Session,
+    user_client_id: int,
+    game_id: int,
+    status: GameStatus,
+    guess_count: int,
+) -> None:
+    user_stats = lock_user_stats(user_client_id, session)
+    session.execute(update(Game).where(Game.id == game_id).values(status=status))
+    user_stats.record_game(status, guess_count)
+
+
+def create_guess(
+    session: Session, user_client_id: int, game_id: int, guess_create: GuessCreate
+) -> GuessRead:
+    """Submit a guess in as few round trips as possible.
+
+    The game row is locked before its guesses are read, so concurrent guesses on a
+    game are serialized. The guess is inserted with
+    RETURNING and the response is built from that read, the country catalog and
+    the pair matrix, without reloading anything through the ORM.
+    """
+    catalog = get_country_catalog()
+    guessed_country_id = guess_create.guessed_country_id
+
+    answer_country_id, status, previous_guesses = _lock_game(
+        session, user_client_id, game_id
+    )
+    if status != GameStatus.IN_PROGRESS:
+        raise HTTPException(status_code=400, detail="Game is already complete")
+
+    guess_count = len(previous_guesses)
+    if guess_count >= MAX_GUESSES:
+        raise HTTPException(status_code=400, detail="Maximum guesses reached")
+
+    if guessed_country_id not in catalog.items:
+        raise HTTPException(status_code=404, detail="Country not found")
+
+    metrics = _guess_metrics(guessed_country_id, answer_country_id)
+    guess_id = _insert_guesses(
+        session,
+        insert(Guess)
+        .values(
+            game_id=game_id,
+            guessed_country_id=guessed_country_id,
+            index=guess_count,
+            **metrics,
+        )
+        .returning(Guess.id),
+    ).scalar_one()
+
+    final_status = _final_status(guessed_country_id, answer_country_id, guess_count + 1)
+    if final_status:
+        _finish_game(session, user_client_id, game_id, final_status, guess_count + 1)
+        status = final_status
+
+    session.commit()
+
+    guess_item = _guess_item(
+        catalog, answer_country_id, guess_id, guessed_country_id, guess_count, metrics
+    )
+    game = GameRead(
+        id=game_id,
+        user_client_id=user_client_id,
+        answer_country_id=answer_country_id,
+        status=status,
+        answer_country=catalog.items[answer_country_id],
+        guesses=[
+            *_stored_guess_items(catalog, answer_country_id, previous_guesses),
+            guess_item,
+        ],
+    )
+    return GuessRead(**dict(guess_item), game=game)
+
+
+def create_guesses(
+    session: Session,
+    user_client_id: int,
+    game_id: int,
+    guess_batch: GuessBatchCreate,
+) -> GameRead:
+    """Submit several guesses in order, in one transaction.
+
+    The same rules as create_guess apply to each guess, and a batch that would
+    break any of them is rejected whole. With start_index set, guesses the game
+    already has are matched against the batch and skipped, so resending a batch
+    is a no-op rather than an error.
+    """
+    catalog = get_country_catalog()
+    answer_country_id, status, previous_guesses = _lock_game(
+        session, user_client_id, game_id
+    )
+    guess_count = len(previous_guesses)
+
+    guessed_country_ids = guess_batch.guessed_country_ids
+    if guess_batch.start_index is not None:
+        if guess_batch.start_index > guess_count:
+            raise HTTPException(
+                status_code=409, detail="Guesses before start_index are missing"
+            )
+        applied_ids = [
+            row.guessed_country_id
+            for row in previous_guesses[guess_batch.start_index :]
+        ]
+        if applied_ids != guessed_country_ids[: len(applied_ids)]:
+            raise HTTPException(
+                status_code=409, detail="Guesses conflict with the game's guesses"
+            )
+        guessed_country_ids = guessed_country_ids[len(applied_ids) :]
+
+    guess_items = _stored_guess_items(catalog, answer_country_id, previous_guesses)
+    if guessed_country_ids:
+        if status != GameStatus.IN_PROGRESS:
+            raise HTTPException(status_code=400, detail="Game is already complete")
+        if guess_count + len(guessed_country_ids) > MAX_GUESSES:
+            raise HTTPException(status_code=400, detail="Maximum guesses reached")
+        if any(i not in catalog.items for i in guessed_country_ids):
+            raise HTTPException(status_code=404, detail="Country not found")
+        if answer_country_id in guessed_country_ids[:-1]:
+            # The answer ends the game, so nothing may follow it
+            raise HTTPException(status_code=400, detail="Game is already complete")
+
+        values = [
+            {
+                "game_id": game_id,
+                "guessed_country_id": guessed_country_id,
+                "index": index,
+                **_guess_metrics(guessed_country_id, answer_country_id),
+            }
+            for index, guessed_country_id in enumerate(
+                guessed_country_ids, start=guess_count
+            )
+        ]
+        # Postgres doesn't promise RETURNING rows in VALUES order, so match by index
+        guess_ids = dict(
+            _insert_guesses(
+                session, insert(Guess).values(values).returning(Guess.index, Guess.id)
+            ).all()
+        )
+
+        guess_count += len(guessed_country_ids)
+        final_status = _final_status(
+            guessed_country_ids[-1], answer_country_id, guess_count
+        )
+        if final_status:
+            _finish_game(session, user_client_id, game_id, final_status, guess_count)
+            status = final_status
+
+        guess_items += [
+            _guess_item(
+                catalog,
+                answer_country_id,
+                guess_ids[value["index"]],
+                value["guessed_country_id"],
+                value["index"],
+                value,
+            )
+            for value in values
+        ]
+    session.commit()
+
+    return GameRead(
+        id=game_id,
+        user_client_id=user_client_id,
+        answer_country_id=answer_country_id,
+        status=status,
+        answer_country=catalog.items[answer_country_id],
+        guesses=guess_items,
+    )
@@ -0,0 +1,45 @@
+# Gunicorn hooks for Prometheus multiprocess mode, the shared country data snapshot
+# and --preload warmup; use with `gunicorn --config python:worldle.api.gunicorn_conf`
+# and PROMETHEUS_MULTIPROC_DIR / WORLDLE_SNAPSHOT_DIR.
+
+import os
+import shutil
+from pathlib import Path
+
+from prometheus_client import multiprocess
+
+
+def _reset_multiproc_dir() -> None:
+    # Drop values written by a previous master's workers. This runs when gunicorn
+    # loads this config, before --preload imports the app and its metrics open
+    # their files in the directory, so it can't wait for on_starting.
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+
+_reset_multiproc_dir()
+
+
+def on_starting(server) -> None:
+    # Build the country data once so workers map it rather than each building it
+    if os.environ.get("WORLDLE_SNAPSHOT_DIR"):
+        from worldle.prep.build_snapshot import publish_snapshot
+
+        publish_snapshot()
+
+
+def when_ready(server) -> None:
+    # With --preload the app is already imported here, so fill its caches once
+    # and let every worker inherit them
+    if server.cfg.preload_app:
+        from worldle.api.main import warm_up
+
+        warm_up()
+
+
+def child_exit(server, worker) -> None:
+    # Stop counting a dead worker's live gauges
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -3,10 +3,10 @@ from __future__ import annotations
 from enum import StrEnum
 from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing_extensions import TypedDict
 
-from worldle.utils.game import CompassDirection, GameStatus
+from worldle.utils.game import MAX_GUESSES, CompassDirection, GameMode, GameStatus
 
 
 class GeoJsonGeometryType(StrEnum):
@@ -81,6 +81,14 @@ class GuessCreate(ApiModel):
     guessed_country_id: int
 
 
+class GuessBatchCreate(ApiModel):
+    guessed_country_ids: list[int] = Field(min_length=1, max_length=MAX_GUESSES)
+    # Index of the first guess in the batch. When set, guesses the game already
+    # has from that index on must match and are skipped, so a queued batch can be
+    # resent safely after a dropped response.
+    start_index: int | None = Field(default=None, ge=0)
+
+
 class GameBase(ApiModel):
     id: int
     user_client_id: int
@@ -92,6 +100,7 @@ class GameBase(ApiModel):
 
 class GameCreate(ApiModel):
     user_client_uuid: str
+    mode: GameMode = GameMode.RANDOM
 
 
 class GameItem(GameBase):
@@ -1,32 +1,101 @@
+import asyncio
 import uuid
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from contextlib import asynccontextmanager
 from typing import Annotated
 
 import rl.utils.io
-from diskcache import Cache
-from fastapi import Depends, FastAPI, Header, HTTPException, Response
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, defer
-
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from rl.utils import LOGGER
+from sqlalchemy.orm import Session
+
+from worldle.api import aio, games
+from worldle.api.auth import (
+    UserClientIdentity,
+    issue_token,
+    remember_user_client,
+    resolve_user_client,
+)
+from worldle.api.catalog import CatalogBody, get_country_catalog
 from worldle.api.interfaces import (
     CountryItem,
     CountryRead,
     GameCreate,
     GameRead,
-    GameStatus,
+    GuessBatchCreate,
     GuessCreate,
     GuessRead,
     UserClientRead,
 )
-from worldle.db.models import Country, Game, Guess, UserClient
-from worldle.db.session import get_session
-from worldle.utils.game import MAX_GUESSES
+from worldle.api.metrics import (
+    MetricsMiddleware,
+    install_sql_listeners,
+    metrics_response,
+)
+from worldle.api.responses import fast_json
+from worldle.db.models import UserClient
+from worldle.db.session import (
+    get_async_engine,
+    get_engine,
+    get_pool_stats,
+    get_session,
+)
+from worldle.utils.cache import (
+    TTLCache,
+    enable_background_refresh,
+    get_country_data_caches,
+)
+from worldle.utils.difficulty import CountryDifficulty, get_country_difficulties
 from worldle.utils.stats import UserStats, get_user_stats
 
-_COUNTRIES_CACHE = Cache(rl.utils.io.get_cache_dir("countries"))
+# Serve the game endpoints from async handlers on an AsyncEngine instead of
+# sync handlers on the threadpool.
+USE_ASYNC_DB = rl.utils.io.getenv("WORLDLE_ASYNC_DB", "false").lower() == "true"
+
+# The rollups only change when refresh_country_difficulty runs
+_COUNTRY_DIFFICULTY_CACHE: TTLCache[str, CatalogBody] = TTLCache(maxsize=1, ttl=300)
+_COUNTRY_DIFFICULTY_ADAPTER = TypeAdapter(list[CountryDifficulty])
+
+
+def warm_up() -> bool:
+    """Load the country catalog, answer pool and guess metric matrix.
+
+    Runs in each worker before it serves requests, and in the gunicorn master
+    with --preload so that workers fork with the caches already filled. A cache
+    that fails to load (e.g. while the database is unreachable) is logged and
+    left to load on first use or the next /readyz. Returns whether all loaded.
+    """
+    ready = True
+    for cache in get_country_data_caches():
+        if cache.is_loaded:
+            continue
+        try:
+            cache.get()
+        except Exception:
+            LOGGER.exception("Couldn't load %s", cache.name)
+            ready = False
+    return ready
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    warm_up()
+    if not USE_ASYNC_DB:
+        yield
+        return
+    # The async handlers run on the event loop, so refresh the caches from a task
+    enable_background_refresh()
+    refresh_task = asyncio.create_task(aio.refresh_country_data_periodically())
+    try:
+        yield
+    finally:
+        refresh_task.cancel()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -34,6 +103,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_sql_listeners()
+app.add_middleware(
+    MetricsMiddleware,
+    get_pool_stats=lambda: get_pool_stats(
+        get_async_engine() if USE_ASYNC_DB else get_engine()
+    ),
+)
+
+# Game endpoints; replaced by worldle.api.aio.router when USE_ASYNC_DB is set
+router = APIRouter()
 
 
 # region Dependencies
@@ -47,19 +126,10 @@ def get_db() -> Generator[Session, None, None]:
         session.close()
 
 
-def get_country(db: Annotated[Session, Depends(get_db)], country_id: int) -> Country:
-    country = db.get(Country, country_id)
-    if not country:
-        raise HTTPException(status_code=404, detail="Country not found")
-    return country
-
-
 def get_user_client(
     db: Annotated[Session, Depends(get_db)], user_client_uuid: str
-) -> UserClient:
-    user_client = db.scalar(
-        select(UserClient).where(UserClient.uuid == user_client_uuid)
-    )
+) -> UserClientIdentity:
+    user_client = resolve_user_client(db, user_client_uuid)
     if not user_client:
         raise HTTPException(status_code=404, detail="User client not found")
     return user_client
@@ -68,15 +138,13 @@ def get_user_client(
 def get_authed_user_client(
     db: Annotated[Session, Depends(get_db)],
     x_worldle_user_client_uuid: str | None = Header(None),
-) -> UserClient:
+) -> UserClientIdentity:
     if not x_worldle_user_client_uuid:
         raise HTTPException(
             status_code=401, detail="X-Worldle-User-Client-Uuid header is required"
         )
 
-    user_client = db.scalar(
-        select(UserClient).where(UserClient.uuid == x_worldle_user_client_uuid)
-    )
+    user_client = resolve_user_client(db, x_worldle_user_client_uuid)
     if not user_client:
         raise HTTPException(status_code=404, detail="User client not found")
     return user_client
@@ -85,25 +153,28 @@ def get_authed_user_client(
 # endregion
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    # Retry whatever the warmup couldn't load; this runs on the threadpool
+    ready = warm_up()
+    caches = {cache.name: cache.is_loaded for cache in get_country_data_caches()}
+    return JSONResponse(
+        {"ready": ready, "caches": caches}, status_code=200 if ready else 503
+    )
+
+
 @app.get(
     "/countries",
     response_model=list[CountryItem],
     operation_id="listCountries",
 )
-def list_countries(response: Response, db: Annotated[Session, Depends(get_db)]):
-    response.headers["Cache-Control"] = "public, max-age=86400"  # Cache for 24 hours
-
-    cache_key = "__all_countries"
-    if cache_key in _COUNTRIES_CACHE:
-        return _COUNTRIES_CACHE[cache_key]
-
-    countries = db.scalars(
-        select(Country)
-        .options(defer(Country.geometry), defer(Country.geo_point))
-        .order_by(Country.name.asc())
-    ).all()
-    _COUNTRIES_CACHE[cache_key] = [CountryItem.model_validate(c) for c in countries]
-    return _COUNTRIES_CACHE[cache_key]
+def list_countries(request: Request):
+    return get_country_catalog().list_body.to_response(request)
 
 
 @app.get(
@@ -111,18 +182,26 @@ def list_countries(response: Response, db: Annotated[Session, Depends(get_db)]):
     response_model=CountryRead,
     operation_id="readCountry",
 )
-def read_country(
-    response: Response,
-    country: Annotated[Country, Depends(get_country)],
-):
-    response.headers["Cache-Control"] = "public, max-age=86400"  # Cache for 24 hours
+def read_country(request: Request, country_id: int):
+    body = get_country_catalog().country_bodies.get(country_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Country not found")
+    return body.to_response(request)
 
-    cache_key = f"__country_{country.id}"
-    if cache_key in _COUNTRIES_CACHE:
-        return _COUNTRIES_CACHE[cache_key]
 
-    _COUNTRIES_CACHE[cache_key] = CountryRead.model_validate(country)
-    return _COUNTRIES_CACHE[cache_key]
+@app.get(
+    "/country_difficulty",
+    response_model=list[CountryDifficulty],
+    operation_id="listCountryDifficulty",
+)
+def list_country_difficulty(request: Request, db: Annotated[Session, Depends(get_db)]):
+    body = _COUNTRY_DIFFICULTY_CACHE.get("all")
+    if body is None:
+        body = CatalogBody.from_content(
+            _COUNTRY_DIFFICULTY_ADAPTER.dump_json(get_country_difficulties(db))
+        )
+        _COUNTRY_DIFFICULTY_CACHE.set("all", body)
+    return body.to_response(request, cache_control="public, max-age=300")
 
 
 @app.post(
@@ -135,7 +214,7 @@ def create_user_client(db: Annotated[Session, Depends(get_db)]):
     db.add(client)
     db.commit()
     db.refresh(client)
-    return client
+    return UserClientRead(uuid=issue_token(remember_user_client(client)))
 
 
 @app.get(
@@ -144,130 +223,88 @@ def create_user_client(db: Annotated[Session, Depends(get_db)]):
     operation_id="readUserClient",
 )
 def read_user_client(
-    user_client: Annotated[UserClient, Depends(get_user_client)],
+    user_client: Annotated[UserClientIdentity, Depends(get_user_client)],
 ):
-    return user_client
+    # Clients that still use a bare uuid are handed a token to switch to
+    return UserClientRead(uuid=issue_token(user_client))
 
 
-@app.get(
+@router.get(
     "/user_clients/{user_client_uuid}/current_game",
     response_model=GameRead | None,
     operation_id="readCurrentGame",
 )
 def read_current_game(
     db: Annotated[Session, Depends(get_db)],
-    user_client: Annotated[UserClient, Depends(get_user_client)],
+    user_client: Annotated[UserClientIdentity, Depends(get_user_client)],
 ):
-    return db.scalar(
-        select(Game)
-        .where(Game.user_client_id == user_client.id)
-        .where(Game.status == GameStatus.IN_PROGRESS)
-        .order_by(Game.created_at.desc())
-        .limit(1)
-    )
+    return fast_json(games.read_current_game(db, user_client.id))
 
 
-@app.get(
+@router.get(
     "/user_clients/{user_client_uuid}/stats",
     response_model=UserStats,
     operation_id="readUserStats",
 )
 def read_user_stats(
     db: Annotated[Session, Depends(get_db)],
-    user_client: Annotated[UserClient, Depends(get_user_client)],
+    user_client: Annotated[UserClientIdentity, Depends(get_user_client)],
 ):
-    return get_user_stats(user_client.id, db)
+    return fast_json(get_user_stats(user_client.id, db))
 
 
-@app.post(
+@router.post(
     "/games",
     response_model=GameRead,
     operation_id="createGame",
 )
 def create_game(
     db: Annotated[Session, Depends(get_db)],
-    user_client: Annotated[UserClient, Depends(get_authed_user_client)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
     game_create: GameCreate,
 ):
-    active_game = db.scalar(
-        select(Game)
-        .where(Game.user_client_id == user_client.id)
-        .where(Game.status == GameStatus.IN_PROGRESS)
-    )
-    if active_game:
-        # TODO: Should we do this here or require a separate API call first?
-        active_game.status = GameStatus.ABANDONED
-
-    # Get random country for answer
-    answer_country = db.scalar(
-        select(Country)
-        .where(Country.svg_bucket_path.isnot(None))
-        .order_by(func.random())
-        .limit(1)
-    )
-
-    game = Game(
-        user_client=user_client,
-        answer_country=answer_country,
-        status=GameStatus.IN_PROGRESS,
-    )
-    db.add(game)
-    db.commit()
-    db.refresh(game)
-    return game
+    return fast_json(games.create_game(db, user_client.id, game_create))
 
 
-@app.get(
+@router.get(
     "/games/{game_id}",
     response_model=GameRead,
     operation_id="readGame",
 )
 def read_game(
     db: Annotated[Session, Depends(get_db)],
-    user_client: Annotated[UserClient, Depends(get_authed_user_client)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
     game_id: int,
 ):
-    game = db.get(Game, game_id)
-    if not game or game.user_client_id != user_client.id:
-        raise HTTPException(status_code=404, detail="Game not found")
-    return game
+    return fast_json(games.read_game(db, user_client.id, game_id))
 
 
-@app.post(
+@router.post(
     "/games/{game_id}/guesses",
     response_model=GuessRead,
     operation_id="createGuess",
 )
 def create_guess(
     db: Annotated[Session, Depends(get_db)],
-    user_client: Annotated[UserClient, Depends(get_authed_user_client)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
     game_id: int,
     guess_create: GuessCreate,
 ):
-    game = db.get(Game, game_id)
-    if not game or game.user_client_id != user_client.id:
-        raise HTTPException(status_code=404, detail="Game not found")
+    return fast_json(games.create_guess(db, user_client.id, game_id, guess_create))
 
-    if game.status != GameStatus.IN_PROGRESS:
-        raise HTTPException(status_code=400, detail="Game is already complete")
-
-    guess_count = len(game.guesses)
-    if guess_count >= MAX_GUESSES:
-        raise HTTPException(status_code=400, detail="Maximum guesses reached")
-
-    guessed_country = db.get(Country, guess_create.guessed_country_id)
-    if not guessed_country:
-        raise HTTPException(status_code=404, detail="Country not found")
 
-    guess = Guess(game=game, guessed_country=guessed_country, index=guess_count)
-    db.add(guess)
+@router.post(
+    "/games/{game_id}/guesses/batch",
+    response_model=GameRead,
+    operation_id="createGuessBatch",
+)
+def create_guess_batch(
+    db: Annotated[Session, Depends(get_db)],
+    user_client: Annotated[UserClientIdentity, Depends(get_authed_user_client)],
+    game_id: int,
+    guess_batch: GuessBatchCreate,
+):
+    return fast_json(games.create_guesses(db, user_client.id, game_id, guess_batch))
 
-    # Update game status
-    if guessed_country.id == game.answer_country_id:
-        game.status = GameStatus.WON
-    elif guess_count == MAX_GUESSES - 1:  # This is the last guess
-        game.status = GameStatus.LOST
 
-    db.commit()
-    db.refresh(guess)
-    return guess
+app.include_router(aio.router if USE_ASYNC_DB else router)
@@ -0,0 +1,159 @@
+import os
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from worldle.db.session import PoolStats
+from worldle.db.slow_queries import query_origin
+from worldle.utils.metrics import (
+    DB_POOL_CONNECTIONS,
+    DB_POOL_WAIT_SECONDS,
+    DB_POOL_WAITS,
+    REQUEST_LATENCY,
+    REQUESTS_IN_PROGRESS,
+    RESPONSE_SIZE,
+    SQL_DURATION,
+    SQL_STATEMENTS,
+)
+
+
+@dataclass
+class _SqlTally:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+# The current request's SQL tally. Sync handlers run in a copy of the request's
+# context and the async engine propagates it into its greenlets, so statements from
+# either path land in the same (mutable) tally.
+_SQL_TALLY: ContextVar[_SqlTally | None] = ContextVar("worldle_sql_tally", default=None)
+
+
+# The start time goes on the statement's execution context rather than the
+# connection, since after_cursor_execute doesn't fire for a statement that raises
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context._worldle_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    start = context._worldle_query_start
+    tally = _SQL_TALLY.get()
+    if tally is not None:
+        tally.statements += 1
+        tally.seconds += time.perf_counter() - start
+
+
+def install_sql_listeners() -> None:
+    """Tally every engine's statements (sync, and async via its sync engine)."""
+    if not sa.event.contains(
+        sa.Engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        sa.event.listen(sa.Engine, "before_cursor_execute", _before_cursor_execute)
+        sa.event.listen(sa.Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _PoolObserver:
+    """Mirrors a pool's stats into gauges, and its cumulative waits into counters."""
+
+    def __init__(self, get_pool_stats: Callable[[], PoolStats]):
+        self._get_pool_stats = get_pool_stats
+        self._wait_count = 0
+        self._total_wait_seconds = 0.0
+
+    @staticmethod
+    def _increase(current: float, previous: float) -> float:
+        # A replaced pool (e.g. after dispose()) starts counting from zero again
+        return current - previous if current >= previous else current
+
+    def observe(self) -> None:
+        stats = self._get_pool_stats()
+        DB_POOL_CONNECTIONS.labels(state="checked_out").set(stats.checked_out)
+        DB_POOL_CONNECTIONS.labels(state="checked_in").set(stats.checked_in)
+        DB_POOL_CONNECTIONS.labels(state="overflow").set(stats.overflow)
+        DB_POOL_CONNECTIONS.labels(state="capacity").set(
+            stats.pool_size + stats.max_overflow
+        )
+        DB_POOL_WAITS.inc(self._increase(stats.wait_count, self._wait_count))
+        DB_POOL_WAIT_SECONDS.inc(
+            self._increase(stats.total_wait_seconds, self._total_wait_seconds)
+        )
+        self._wait_count = stats.wait_count
+        self._total_wait_seconds = stats.total_wait_seconds
+
+
+class MetricsMiddleware:
+    """Records latency, size, in-flight count and SQL usage per HTTP request.
+
+    Requests are labelled by route template (e.g. ``/games/{game_id}``) so that
+    label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp, get_pool_stats: Callable[[], PoolStats]):
+        self.app = app
+        self._pool = _PoolObserver(get_pool_stats)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        # The route is only known once routing has run, so in-flight requests are
+        # only broken down by method
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        tally = _SqlTally()
+        token = _SQL_TALLY.set(tally)
+        origin_token = query_origin.set(f"{method} {scope['path']}")
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            _SQL_TALLY.reset(token)
+            query_origin.reset(origin_token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(
+                method=method, route=route_path, status=str(status)
+            ).observe(elapsed)
+            RESPONSE_SIZE.labels(method=method, route=route_path).observe(size)
+            SQL_STATEMENTS.labels(method=method, route=route_path).observe(
+                tally.statements
+            )
+            SQL_DURATION.labels(method=method, route=route_path).observe(tally.seconds)
+            self._pool.observe()
+
+
+def metrics_response() -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate what every worker has written
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,39 @@
+from typing import Any, TypeVar
+
+import orjson
+import rl.utils.io
+from fastapi import Response
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# Encode game endpoint payloads directly with orjson instead of letting FastAPI
+# validate and re-serialize them against the route's response_model
+USE_FAST_JSON = rl.utils.io.getenv("WORLDLE_FAST_JSON", "false").lower() == "true"
+
+
+class ORJSONModelResponse(Response):
+    """A JSON response for API models, plain dicts and lists, encoded with orjson.
+
+    The output is equivalent JSON to what FastAPI's default path produces for the
+    same model: compact separators, UTF-8, fields in declaration order and int
+    dict keys (as in UserStats.guess_distribution) as strings. It isn't always
+    byte-for-byte the same, since floats in exponent form are written without
+    zero padding (``1e-7`` rather than ``1e-07``).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def fast_json(content: T) -> T | ORJSONModelResponse:
+    """Wrap a handler's return value in a ready-encoded response if USE_FAST_JSON.
+
+    FastAPI skips response_model handling entirely for returned responses, which
+    also saves sync handlers a second trip through the threadpool.
+    """
+    return ORJSONModelResponse(content) if USE_FAST_JSON else content
@@ -0,0 +1,159 @@
+import time
+from collections.abc import Callable
+
+import numpy as np
+import rl.utils.click as click
+from fastapi import HTTPException
+from rl.utils import LOGGER
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload
+
+from worldle.api import games
+from worldle.api.catalog import get_country_catalog
+from worldle.api.interfaces import GameCreate, GuessCreate, GuessRead
+from worldle.db.models import Country, GameStatus, Guess, UserClient
+from worldle.db.session import capture_statements, get_session
+from worldle.utils.game import MAX_GUESSES
+from worldle.utils.geo import get_pair_matrix
+from worldle.utils.stats import lock_user_stats
+
+_BENCH_USER_CLIENT_UUID = "bench-create-guess"
+
+CreateGuess = Callable[[Session, int, int, GuessCreate], GuessRead]
+
+
+def create_guess_orm(
+    session: Session, user_client_id: int, game_id: int, guess_create: GuessCreate
+) -> GuessRead:
+    """The ORM implementation of games.create_guess, kept as the baseline."""
+    game = games._get_user_game(session, user_client_id, game_id)
+
+    if game.status != GameStatus.IN_PROGRESS:
+        raise HTTPException(status_code=400, detail="Game is already complete")
+
+    guess_count = len(game.guesses)
+    if guess_count >= MAX_GUESSES:
+        raise HTTPException(status_code=400, detail="Maximum guesses reached")
+
+    guessed_country = session.get(Country, guess_create.guessed_country_id)
+    if not guessed_country:
+        raise HTTPException(status_code=404, detail="Country not found")
+
+    guess = Guess(game=game, guessed_country_id=guessed_country.id, index=guess_count)
+    guess.fill_metrics()
+    session.add(guess)
+
+    if guessed_country.id == game.answer_country_id:
+        final_status = GameStatus.WON
+    elif guess_count == MAX_GUESSES - 1:
+        final_status = GameStatus.LOST
+    else:
+        final_status = None
+
+    if final_status:
+        user_stats = lock_user_stats(user_client_id, session)
+        game.status = final_status
+        user_stats.record_game(final_status, guess_count + 1)
+
+    session.commit()
+    # refresh() only reloads columns now that relationships never load implicitly
+    guess = session.scalars(
+        select(Guess)
+        .where(Guess.id == guess.id)
+        .options(
+            joinedload(Guess.guessed_country),
+            joinedload(Guess.game).options(*games._GAME_READ_OPTIONS),
+        )
+        .execution_options(populate_existing=True)
+    ).one()
+    return GuessRead.model_validate(guess)
+
+
+def _get_bench_user_client_id() -> int:
+    with get_session() as session:
+        session.execute(
+            insert(UserClient)
+            .values(uuid=_BENCH_USER_CLIENT_UUID)
+            .on_conflict_do_nothing()
+        )
+        session.commit()
+        return session.scalar(
+            select(UserClient.id).where(UserClient.uuid == _BENCH_USER_CLIENT_UUID)
+        )
+
+
+def _play_game(
+    create_guess: CreateGuess,
+    user_client_id: int,
+    num_guesses: int,
+    country_ids: list[int],
+) -> list[tuple[float, int]]:
+    """Play a game to the end, returning each guess's (seconds, statements)."""
+    with get_session() as session:
+        game = games.create_game(
+            session,
+            user_client_id,
+            GameCreate(user_client_uuid=_BENCH_USER_CLIENT_UUID),
+        )
+    wrong_ids = [c for c in country_ids if c != game.answer_country_id]
+    guessed_ids = [*wrong_ids[: num_guesses - 1], game.answer_country_id]
+
+    timings = []
+    for guessed_country_id in guessed_ids:
+        guess_create = GuessCreate(guessed_country_id=guessed_country_id)
+        with get_session() as session, capture_statements() as statements:
+            start = time.perf_counter()
+            create_guess(session, user_client_id, game.id, guess_create)
+            elapsed = time.perf_counter() - start
+        timings.append((elapsed, len(statements)))
+    return timings
+
+
+@click.command()
+@click.option("-n", "--num-games", type=int, default=100, help="Games per path")
+@click.option(
+    "-g",
+    "--num-guesses",
+    type=click.IntRange(1, MAX_GUESSES),
+    default=MAX_GUESSES,
+    help="Guesses per game, the last of which wins",
+)
+def main(num_games: int, num_guesses: int) -> None:
+    """Compare the ORM and lean create_guess paths against the configured database.
+
+    Games are played as the "bench-create-guess" user client, alternating between
+    the two paths so that both see the same database state.
+    """
+    country_ids = sorted(get_country_catalog().items)
+    get_pair_matrix()
+    user_client_id = _get_bench_user_client_id()
+
+    paths: dict[str, CreateGuess] = {
+        "orm": create_guess_orm,
+        "lean": games.create_guess,
+    }
+    timings: dict[str, list[tuple[float, int]]] = {name: [] for name in paths}
+    for _ in range(num_games):
+        for name, create_guess in paths.items():
+            timings[name].extend(
+                _play_game(create_guess, user_client_id, num_guesses, country_ids)
+            )
+
+    for name, path_timings in timings.items():
+        millis = np.array([s for s, _ in path_timings]) * 1000
+        num_statements = np.array([n for _, n in path_timings])
+        LOGGER.info(
+            "%-5s %5d guesses, %.1f statements/guess, "
+            "mean %.2fms, p50 %.2fms, p95 %.2fms",
+            name,
+            len(path_timings),
+            num_statements.mean(),
+            millis.mean(),
+            np.percentile(millis, 50),
+            np.percentile(millis, 95),
+        )
+
+
+if __name__ == "__main__":
+    main()
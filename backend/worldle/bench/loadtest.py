@@ -0,0 +1,274 @@
+import asyncio
+import contextlib
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+import numpy as np
+import rl.utils.click as click
+from rl.utils import LOGGER
+
+from worldle.utils.game import MAX_GUESSES
+
+# Chance that each guess after the first is the answer, which gives a realistic
+# mix of games won in 2-6 guesses and lost games
+_WIN_PROB_PER_GUESS = 0.3
+
+
+@dataclass
+class _Results:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    num_sessions: int = 0
+
+
+class _SessionError(Exception):
+    pass
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    results: _Results,
+    operation_id: str,
+    method: str,
+    url: str,
+    **kwargs,
+):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        results.errors[operation_id] += 1
+        raise _SessionError(f"{operation_id}: {e}") from e
+    results.latencies[operation_id].append(time.perf_counter() - start)
+    if response.is_error:
+        results.errors[operation_id] += 1
+        raise _SessionError(f"{operation_id}: HTTP {response.status_code}")
+    return response.json()
+
+
+async def _play_session(
+    client: httpx.AsyncClient, results: _Results, rng: random.Random
+) -> None:
+    """One visit: a new player fetches countries, plays a game and checks stats."""
+    user_client = await _request(
+        client, results, "createUserClient", "POST", "/user_clients"
+    )
+    user_client_uuid = user_client["uuid"]
+    headers = {"X-Worldle-User-Client-Uuid": user_client_uuid}
+
+    countries = await _request(client, results, "listCountries", "GET", "/countries")
+    await _request(
+        client,
+        results,
+        "readCurrentGame",
+        "GET",
+        f"/user_clients/{user_client_uuid}/current_game",
+    )
+    game = await _request(
+        client,
+        results,
+        "createGame",
+        "POST",
+        "/games",
+        headers=headers,
+        json={"user_client_uuid": user_client_uuid},
+    )
+
+    answer_id = game["answer_country_id"]
+    wrong_ids = rng.sample(
+        [c["id"] for c in countries if c["id"] != answer_id], MAX_GUESSES
+    )
+    for i, guessed_country_id in enumerate(wrong_ids):
+        if i > 0 and rng.random() < _WIN_PROB_PER_GUESS:
+            guessed_country_id = answer_id
+        guess = await _request(
+            client,
+            results,
+            "createGuess",
+            "POST",
+            f"/games/{game['id']}/guesses",
+            headers=headers,
+            json={"guessed_country_id": guessed_country_id},
+        )
+        if guess["game"]["status"] != "in_progress":
+            break
+
+    await _request(
+        client,
+        results,
+        "readUserStats",
+        "GET",
+        f"/user_clients/{user_client_uuid}/stats",
+    )
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    results: _Results,
+    deadline: float,
+    seed: int,
+    think_time: float,
+) -> None:
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        try:
+            await _play_session(client, results, rng)
+            results.num_sessions += 1
+        except _SessionError as e:
+            LOGGER.debug("Session failed: %s", e)
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+
+
+async def _run(
+    url: str | None, concurrency: int, duration: float, think_time: float
+) -> tuple[_Results, float]:
+    if url:
+        transport = None
+        lifespan = contextlib.nullcontext()
+    else:
+        # Imported here so that testing a remote server doesn't need a database
+        from worldle.api.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        # The ASGI transport doesn't run the lifespan, which warms the caches
+        lifespan = app.router.lifespan_context(app)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with (
+        lifespan,
+        httpx.AsyncClient(
+            transport=transport,
+            base_url=url or "http://worldle",
+            limits=limits,
+            timeout=30,
+        ) as client,
+    ):
+        results = _Results()
+        start = time.monotonic()
+        await asyncio.gather(
+            *(
+                _worker(client, results, start + duration, seed, think_time)
+                for seed in range(concurrency)
+            )
+        )
+        return results, time.monotonic() - start
+
+
+def _summarize(results: _Results, elapsed: float) -> dict[str, dict[str, float]]:
+    summary = {}
+    for operation_id, latencies in sorted(results.latencies.items()):
+        millis = np.array(latencies) * 1000
+        summary[operation_id] = {
+            "requests": len(latencies),
+            "errors": results.errors.get(operation_id, 0),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": float(np.percentile(millis, 50)),
+            "p95_ms": float(np.percentile(millis, 95)),
+            "p99_ms": float(np.percentile(millis, 99)),
+        }
+    return summary
+
+
+@click.command()
+@click.option(
+    "-u",
+    "--url",
+    type=str,
+    default=None,
+    help="Base URL of a running API (e.g. a local gunicorn); in-process if omitted",
+)
+@click.option(
+    "-c", "--concurrency", type=int, default=32, help="Concurrent simulated players"
+)
+@click.option(
+    "-d", "--duration", type=float, default=60, help="Seconds to generate load for"
+)
+@click.option(
+    "-t",
+    "--think-time",
+    type=float,
+    default=0,
+    help="Mean seconds a player waits between sessions (0 for closed-loop load)",
+)
+@click.option(
+    "-o",
+    "--output-path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Also write the per-endpoint summary here as JSON",
+)
+def main(
+    url: str | None,
+    concurrency: int,
+    duration: float,
+    think_time: float,
+    output_path: Path | None,
+) -> None:
+    """Replay game sessions against the API and report per-endpoint latency.
+
+    Each simulated player creates a user client, fetches the countries, plays one
+    game to the end and reads their stats, over and over. Point it at a local
+    database (it creates real users and games), either in-process or against a
+    running server with --url.
+    """
+    results, elapsed = asyncio.run(_run(url, concurrency, duration, think_time))
+    summary = _summarize(results, elapsed)
+
+    LOGGER.info(
+        "%d sessions in %.1fs at concurrency %d (%.1f sessions/s)",
+        results.num_sessions,
+        elapsed,
+        concurrency,
+        results.num_sessions / elapsed,
+    )
+    LOGGER.info(
+        "%-20s %8s %6s %8s %9s %9s %9s",
+        "endpoint",
+        "requests",
+        "errors",
+        "req/s",
+        "p50 ms",
+        "p95 ms",
+        "p99 ms",
+    )
+    for operation_id, row in summary.items():
+        LOGGER.info(
+            "%-20s %8d %6d %8.1f %9.2f %9.2f %9.2f",
+            operation_id,
+            row["requests"],
+            row["errors"],
+            row["rps"],
+            row["p50_ms"],
+            row["p95_ms"],
+            row["p99_ms"],
+        )
+    if not url:
+        from worldle.api.main import USE_ASYNC_DB
+        from worldle.db.session import get_async_engine, get_engine, get_pool_stats
+
+        engine = get_async_engine() if USE_ASYNC_DB else get_engine()
+        LOGGER.info("Connection pool: %s", get_pool_stats(engine))
+
+    if output_path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(
+            json.dumps(
+                {
+                    "concurrency": concurrency,
+                    "elapsed_seconds": elapsed,
+                    "num_sessions": results.num_sessions,
+                    "endpoints": summary,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import json
+import random
+import tempfile
+import timeit
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import geoalchemy2 as ga
+import numpy as np
+import rl.utils.click as click
+import rl.utils.io
+import shapely
+from rl.utils import LOGGER
+from shapely.geometry import MultiPolygon, Point, Polygon
+from sqlalchemy.orm import Session
+
+from worldle.api.catalog import _COUNTRY_ITEMS_ADAPTER, CatalogBody
+from worldle.api.interfaces import CountryItem
+from worldle.db.models import Country, Game, GameStatus, Guess
+from worldle.db.session import get_engine
+from worldle.prep.generate_svgs import _generate_svg
+from worldle.prep.ingest_countries import _ingest_countries
+from worldle.utils.game import MAX_GUESSES
+from worldle.utils.geo import build_pair_matrix
+from worldle.utils.stats import GameOutcome, compute_user_stats
+
+_DEFAULT_BASELINE_PATH = rl.utils.io.get_data_path("bench", "micro.json")
+_NUM_COUNTRIES = 250
+
+# Synthetic stand-ins for the largest geometries, as (bounds, number of polygons,
+# points per polygon): one huge landmass, a landmass plus many Arctic islands, and
+# a sprawling archipelago
+_LARGE_GEOMETRIES = {
+    "russia": ((27.0, 41.0, 180.0, 82.0), 120, 2_000),
+    "canada": ((-141.0, 41.0, -52.0, 83.0), 400, 500),
+    "indonesia": ((95.0, -11.0, 141.0, 6.0), 1_500, 80),
+}
+
+
+@dataclass(frozen=True)
+class _Benchmark:
+    name: str
+    # Builds the fixtures and returns the function to time
+    setup: Callable[[], Callable[[], object]]
+    needs_db: bool = False
+
+
+_BENCHMARKS: list[_Benchmark] = []
+
+
+def _benchmark(name: str, needs_db: bool = False):
+    def register(setup: Callable[[], Callable[[], object]]):
+        _BENCHMARKS.append(_Benchmark(name, setup, needs_db))
+        return setup
+
+    return register
+
+
+# region Fixtures
+
+
+def _synthetic_polygon(
+    rng: random.Random, center: tuple[float, float], radius: float, num_points: int
+) -> Polygon:
+    """A star-shaped (so always valid) polygon with a ragged coastline."""
+    angles = np.linspace(0, 2 * np.pi, num_points, endpoint=False)
+    radii = radius * (1 + 0.3 * np.array([rng.random() for _ in angles]))
+    return Polygon(
+        np.column_stack(
+            [center[0] + radii * np.cos(angles), center[1] + radii * np.sin(angles)]
+        )
+    )
+
+
+def _synthetic_multipolygon(
+    seed: str,
+    bounds: tuple[float, float, float, float],
+    num_polygons: int,
+    num_points: int,
+) -> MultiPolygon:
+    rng = random.Random(seed)
+    minx, miny, maxx, maxy = bounds
+    # The first polygon is the mainland; the rest are islands
+    polygons = [
+        _synthetic_polygon(
+            rng,
+            ((minx + maxx) / 2, (miny + maxy) / 2),
+            min(maxx - minx, maxy - miny) / 4,
+            num_points * 10 if num_polygons > 1 else num_points,
+        )
+    ]
+    for _ in range(num_polygons - 1):
+        polygons.append(
+            _synthetic_polygon(
+                rng,
+                (rng.uniform(minx, maxx), rng.uniform(miny, maxy)),
+                rng.uniform(0.05, 0.5),
+                num_points,
+            )
+        )
+    return MultiPolygon(polygons)
+
+
+def _synthetic_country_items() -> list[CountryItem]:
+    return [
+        CountryItem(
+            id=i,
+            name=f"Country {i}",
+            iso2=f"C{i % 10}",
+            iso3=f"C{i:02d}"[-3:],
+            status="Member State",
+            continent="Europe",
+            region="Western Europe",
+            parent_id=None,
+            svg_url=f"https://cdn.worldle.lexeme.dev/images/{i:040x}",
+        )
+        for i in range(_NUM_COUNTRIES)
+    ]
+
+
+def _synthetic_points() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return (
+        np.arange(1, _NUM_COUNTRIES + 1, dtype=np.int64),
+        rng.uniform(-180, 180, _NUM_COUNTRIES),
+        rng.uniform(-60, 75, _NUM_COUNTRIES),
+    )
+
+
+def _synthetic_outcomes(num_games: int) -> list[GameOutcome]:
+    rng = random.Random(num_games)
+    statuses = [GameStatus.WON, GameStatus.WON, GameStatus.LOST, GameStatus.ABANDONED]
+    return [
+        GameOutcome(rng.choice(statuses), rng.randint(1, MAX_GUESSES))
+        for _ in range(num_games)
+    ]
+
+
+def _synthetic_country_records() -> list[dict]:
+    """Records in the shape of the world administrative boundaries dataset."""
+    rng = random.Random("records")
+    records = []
+    for i in range(_NUM_COUNTRIES):
+        center = rng.uniform(-170, 170), rng.uniform(-60, 75)
+        geometry = _synthetic_polygon(rng, center, rng.uniform(0.5, 5), 200)
+        records.append(
+            {
+                "geo_shape": {"geometry": shapely.geometry.mapping(geometry)},
+                "geo_point_2d": {"lon": center[0], "lat": center[1]},
+                "iso3": f"X{i:02d}"[-3:],
+                "color_code": "XXX",
+                "name": f"Country {i}",
+                "iso_3166_1_alpha_2_codes": None,
+                "status": "Member State",
+                "continent": "Europe",
+                "region": "Western Europe",
+            }
+        )
+    return records
+
+
+# endregion
+
+# region Benchmarks
+
+
+@_benchmark("guess_metric_properties")
+def _guess_metric_properties():
+    game = Game(answer_country_id=2)
+    guess = Guess(
+        game=game,
+        guessed_country_id=1,
+        index=0,
+        distance_km=1234.5,
+        distance_miles=767.1,
+        bearing=45.0,
+        compass_direction="NORTH_EAST",
+        proximity=0.9,
+    )
+
+    def run():
+        return (
+            guess.is_correct,
+            guess.distance_to_answer_km,
+            guess.distance_to_answer_miles,
+            guess.bearing_to_answer,
+            guess.compass_direction_to_answer,
+            guess.proximity_prop,
+        )
+
+    return run
+
+
+@_benchmark("pair_matrix_metrics")
+def _pair_matrix_metrics():
+    matrix = build_pair_matrix(*_synthetic_points())
+
+    def run():
+        return (
+            matrix.distance_km(1, 2),
+            matrix.distance_miles(1, 2),
+            matrix.bearing_degrees(1, 2),
+            matrix.compass_direction(1, 2),
+            matrix.proximity_prop(1, 2),
+        )
+
+    return run
+
+
+@_benchmark("build_pair_matrix")
+def _build_pair_matrix():
+    points = _synthetic_points()
+    return lambda: build_pair_matrix(*points)
+
+
+@_benchmark("country_geo_point_shp")
+def _country_geo_point_shp():
+    country = Country(geo_point=ga.WKBElement(Point(37.6, 55.7).wkb, srid=4326))
+    return lambda: country.geo_point_shp
+
+
+for _num_games in (10, 1_000, 10_000):
+
+    @_benchmark(f"compute_user_stats_{_num_games}")
+    def _compute_user_stats(num_games=_num_games):
+        outcomes = _synthetic_outcomes(num_games)
+        return lambda: compute_user_stats(outcomes)
+
+
+@_benchmark("country_items_dump_json")
+def _country_items_dump_json():
+    items = _synthetic_country_items()
+    return lambda: _COUNTRY_ITEMS_ADAPTER.dump_json(items)
+
+
+@_benchmark("catalog_body_from_content")
+def _catalog_body_from_content():
+    content = _COUNTRY_ITEMS_ADAPTER.dump_json(_synthetic_country_items())
+    return lambda: CatalogBody.from_content(content)
+
+
+for _name, (_bounds, _num_polygons, _num_points) in _LARGE_GEOMETRIES.items():
+
+    @_benchmark(f"generate_svg_{_name}")
+    def _generate_svg_large(
+        name=_name, bounds=_bounds, num_polygons=_num_polygons, num_points=_num_points
+    ):
+        geometry = _synthetic_multipolygon(name, bounds, num_polygons, num_points)
+        output_dir = Path(tempfile.mkdtemp(prefix="worldle-bench-"))
+        return lambda: _generate_svg(name[:3].upper(), geometry.wkb, output_dir)
+
+
+@_benchmark("ingest_countries", needs_db=True)
+def _ingest_countries_bench():
+    records = _synthetic_country_records()
+
+    def run():
+        # Ingest inside a transaction that is always rolled back; the commit in
+        # _ingest_countries only releases a savepoint
+        with get_engine().connect() as conn:
+            transaction = conn.begin()
+            try:
+                with Session(
+                    bind=conn, join_transaction_mode="create_savepoint"
+                ) as session:
+                    _ingest_countries(records, session)
+            finally:
+                transaction.rollback()
+
+    return run
+
+
+# endregion
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    """The best of ``repeat`` runs, in seconds per call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+@click.command()
+@click.option(
+    "-k",
+    "--filter",
+    "name_filter",
+    type=str,
+    default=None,
+    help="Only run benchmarks whose name contains this",
+)
+@click.option(
+    "--db/--no-db",
+    default=False,
+    help="Also run benchmarks against the configured database (local only!)",
+)
+@click.option("-r", "--repeat", type=int, default=5, help="Timing runs to take best of")
+@click.option(
+    "-b",
+    "--baseline-path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=_DEFAULT_BASELINE_PATH,
+    help="JSON file of per-benchmark timings to compare against",
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Write this run's timings to the baseline file",
+)
+@click.option(
+    "--max-slowdown",
+    type=float,
+    default=0.25,
+    help="Allowed fractional increase in a benchmark's time over baseline",
+)
+def main(
+    name_filter: str | None,
+    db: bool,
+    repeat: int,
+    baseline_path: Path,
+    update_baseline: bool,
+    max_slowdown: float,
+) -> None:
+    """Time the backend's hot paths on synthetic, deterministic fixtures.
+
+    Fails when a benchmark is slower than its baseline by more than
+    ``--max-slowdown``.
+    """
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    timings: dict[str, float] = {}
+    failures: list[str] = []
+    for benchmark in _BENCHMARKS:
+        if name_filter and name_filter not in benchmark.name:
+            continue
+        if benchmark.needs_db and not db:
+            continue
+        seconds = _time(benchmark.setup(), repeat)
+        timings[benchmark.name] = seconds
+        previous = baseline.get(benchmark.name)
+        change = f"{seconds / previous - 1:+7.1%}" if previous else ""
+        LOGGER.info("%-28s %12.1fus %s", benchmark.name, seconds * 1e6, change)
+        if previous and seconds > previous * (1 + max_slowdown):
+            failures.append(
+                f"{benchmark.name}: {previous * 1e6:.1f}us -> {seconds * 1e6:.1f}us"
+            )
+
+    if update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({**baseline, **timings}, indent=2))
+        LOGGER.info("Wrote baseline to %s", baseline_path)
+    if failures:
+        raise click.ClickException(
+            f"{len(failures)} benchmarks regressed:\n" + "\n".join(failures)
+        )
+
+
+if __name__ == "__main__":
+    main()
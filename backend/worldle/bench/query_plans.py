@@ -0,0 +1,308 @@
+import json
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import rl.utils.click as click
+import rl.utils.io
+from fastapi.testclient import TestClient
+from rl.utils import LOGGER
+from sqlalchemy import text
+
+from worldle.api.main import app
+from worldle.db.session import capture_statements, get_engine, get_session
+
+_DEFAULT_BASELINE_PATH = rl.utils.io.get_data_path("bench", "query_plans.json")
+_BENCH_UUID_PREFIX = "bench-"
+
+# Small, bounded tables that Postgres is right to scan sequentially
+_SEQ_SCAN_ALLOWED = {
+    "countries",
+    "rollup_watermarks",
+    "country_difficulty",
+    "country_first_guesses",
+}
+# Worst-case statements per call to each endpoint, counting a user client lookup
+# for bare uuids and creating a missing user_stats row (4 statements) when a game
+# finishes. Exceeding these usually means a relationship is loaded per row.
+_STATEMENT_BUDGETS = {
+    "listCountries": 0,
+    "readCountry": 0,
+    "listCountryDifficulty": 1,
+    "createUserClient": 2,
+    "readUserClient": 1,
+    "readUserStats": 3,
+    "readCurrentGame": 3,
+    "readGame": 3,
+    "createGame": 12,
+    "createGuess": 10,
+    "createGuessBatch": 10,
+}
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+def _seed(num_users: int, games_per_user: int) -> None:
+    """Fill the database with synthetic users, games and guesses.
+
+    Everything seeded belongs to user clients whose uuid starts with "bench-".
+    """
+    with get_session() as session:
+        LOGGER.info("Seeding %d user clients", num_users)
+        session.execute(
+            text(
+                "INSERT INTO user_clients (uuid) "
+                "SELECT :prefix || g FROM generate_series(1, :num_users) g "
+                "ON CONFLICT DO NOTHING"
+            ),
+            {"prefix": _BENCH_UUID_PREFIX, "num_users": num_users},
+        )
+        LOGGER.info("Seeding %d games per user", games_per_user)
+        session.execute(
+            text(
+                "WITH answers AS ("
+                "  SELECT array_agg(id) AS ids FROM countries "
+                "  WHERE svg_bucket_path IS NOT NULL"
+                ") "
+                "INSERT INTO games "
+                "(answer_country_id, user_client_id, status, created_at, updated_at) "
+                "SELECT ids[1 + floor(random() * array_length(ids, 1))::int], u.id, "
+                "  (ARRAY['won', 'won', 'lost', 'abandoned'])"
+                "[1 + floor(random() * 4)::int], "
+                "  now() - g * interval '1 day', now() - g * interval '1 day' "
+                "FROM answers, user_clients u, generate_series(1, :games_per_user) g "
+                "WHERE u.uuid LIKE :prefix || '%'"
+            ),
+            {"prefix": _BENCH_UUID_PREFIX, "games_per_user": games_per_user},
+        )
+        LOGGER.info("Seeding guesses")
+        session.execute(
+            text(
+                "WITH answers AS (SELECT array_agg(id) AS ids FROM countries) "
+                "INSERT INTO guesses (game_id, guessed_country_id, index) "
+                "SELECT games.id, "
+                "  ids[1 + floor(random() * array_length(ids, 1))::int], i - 1 "
+                "FROM answers, games "
+                "JOIN user_clients ON user_clients.id = games.user_client_id, "
+                "LATERAL generate_series(1, 1 + games.id * 7919 % 6) i "
+                "WHERE user_clients.uuid LIKE :prefix || '%' "
+                "ON CONFLICT DO NOTHING"
+            ),
+            {"prefix": _BENCH_UUID_PREFIX},
+        )
+        session.commit()
+        for table in ("user_clients", "games", "guesses"):
+            session.execute(text(f"ANALYZE {table}"))
+        session.commit()
+
+
+def _run_scenario(
+    client: TestClient,
+) -> tuple[dict[str, list[tuple[str, Any]]], list[str]]:
+    """Play one game as a seeded user, capturing each endpoint's statements.
+
+    Also returns a failure for each call that exceeded its endpoint's budget.
+    """
+    captured: dict[str, list[tuple[str, Any]]] = {}
+    failures: list[str] = []
+    user_client_uuid = f"{_BENCH_UUID_PREFIX}1"
+    headers = {"X-Worldle-User-Client-Uuid": user_client_uuid}
+
+    def call(operation_id: str, method: str, url: str, **kwargs) -> Any:
+        with capture_statements() as statements:
+            response = client.request(method, url, **kwargs)
+        response.raise_for_status()
+        captured.setdefault(operation_id, []).extend(statements)
+        if len(statements) > _STATEMENT_BUDGETS[operation_id]:
+            failures.append(
+                f"{operation_id}: {len(statements)} statements, budget is "
+                f"{_STATEMENT_BUDGETS[operation_id]}:\n"
+                + "\n".join(f"  {statement}" for statement, _ in statements)
+            )
+        return response.json()
+
+    countries = call("listCountries", "GET", "/countries")
+    call("readCountry", "GET", f"/countries/{countries[0]['id']}")
+    call("createUserClient", "POST", "/user_clients")
+    call("readUserClient", "GET", f"/user_clients/{user_client_uuid}")
+    game = call(
+        "createGame",
+        "POST",
+        "/games",
+        headers=headers,
+        json={"user_client_uuid": user_client_uuid},
+    )
+    wrong_ids = [c["id"] for c in countries if c["id"] != game["answer_country_id"]]
+    for guessed_country_id in [*wrong_ids[:2], game["answer_country_id"]]:
+        call(
+            "createGuess",
+            "POST",
+            f"/games/{game['id']}/guesses",
+            headers=headers,
+            json={"guessed_country_id": guessed_country_id},
+        )
+    call("readGame", "GET", f"/games/{game['id']}", headers=headers)
+    game = call(
+        "createGame",
+        "POST",
+        "/games",
+        headers=headers,
+        json={"user_client_uuid": user_client_uuid},
+    )
+    wrong_ids = [c["id"] for c in countries if c["id"] != game["answer_country_id"]]
+    call(
+        "createGuessBatch",
+        "POST",
+        f"/games/{game['id']}/guesses/batch",
+        headers=headers,
+        json={
+            "guessed_country_ids": [*wrong_ids[:2], game["answer_country_id"]],
+            "start_index": 0,
+        },
+    )
+    call("readCurrentGame", "GET", f"/user_clients/{user_client_uuid}/current_game")
+    call("readUserStats", "GET", f"/user_clients/{user_client_uuid}/stats")
+    call("listCountryDifficulty", "GET", "/country_difficulty")
+    return captured, failures
+
+
+def _explain(statement: str, parameters: Any) -> dict:
+    if isinstance(parameters, list | tuple) and parameters:
+        # executemany; the plan is the same for every parameter set
+        parameters = parameters[0]
+    conn = get_engine().raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = cursor.fetchone()[0][0]["Plan"]
+        conn.rollback()
+    finally:
+        conn.close()
+    return plan
+
+
+def _iter_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _iter_nodes(child)
+
+
+def _check_plans(
+    captured: dict[str, list[tuple[str, Any]]],
+    baseline: dict[str, list[float]],
+    max_cost_increase: float,
+) -> tuple[dict[str, list[float]], list[str]]:
+    costs: dict[str, list[float]] = {}
+    failures: list[str] = []
+    for operation_id, statements in captured.items():
+        costs[operation_id] = []
+        baseline_costs = baseline.get(operation_id, [])
+        for statement, parameters in statements:
+            if not _EXPLAINABLE.match(statement):
+                continue
+            i = len(costs[operation_id])
+            plan = _explain(statement, parameters)
+            cost = plan["Total Cost"]
+            costs[operation_id].append(cost)
+            for node in _iter_nodes(plan):
+                relation = node.get("Relation Name")
+                if (
+                    node["Node Type"] == "Seq Scan"
+                    and relation not in _SEQ_SCAN_ALLOWED
+                ):
+                    failures.append(
+                        f"{operation_id}: sequential scan on {relation} in\n"
+                        f"  {statement}"
+                    )
+            if i < len(baseline_costs) and cost > baseline_costs[i] * (
+                1 + max_cost_increase
+            ):
+                failures.append(
+                    f"{operation_id}: plan cost rose from {baseline_costs[i]:.1f} "
+                    f"to {cost:.1f} in\n  {statement}"
+                )
+    return costs, failures
+
+
+@click.command()
+@click.option(
+    "--seed/--no-seed",
+    default=False,
+    help="Seed synthetic users, games and guesses first (local databases only!)",
+)
+@click.option("--num-users", type=int, default=20_000, help="Users to seed")
+@click.option("--games-per-user", type=int, default=10, help="Games to seed per user")
+@click.option(
+    "-b",
+    "--baseline-path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=_DEFAULT_BASELINE_PATH,
+    help="JSON file of per-endpoint plan costs to compare against",
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Write this run's plan costs to the baseline file",
+)
+@click.option(
+    "--explain/--no-explain",
+    default=True,
+    help="Check query plans, not just statement budgets",
+)
+@click.option(
+    "--max-cost-increase",
+    type=float,
+    default=0.25,
+    help="Allowed fractional increase in a statement's plan cost over baseline",
+)
+def main(
+    seed: bool,
+    num_users: int,
+    games_per_user: int,
+    baseline_path: Path,
+    update_baseline: bool,
+    explain: bool,
+    max_cost_increase: float,
+) -> None:
+    """Check the statements and query plans of every endpoint.
+
+    Fails when a call emits more statements than its endpoint's budget, on
+    sequential scans of large tables and on plan costs that have regressed
+    against the baseline.
+    """
+    if seed:
+        _seed(num_users, games_per_user)
+
+    with TestClient(app) as client:
+        captured, failures = _run_scenario(client)
+    if not explain:
+        if failures:
+            raise click.ClickException(
+                f"{len(failures)} endpoints over budget:\n" + "\n".join(failures)
+            )
+        return
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    costs, plan_failures = _check_plans(captured, baseline, max_cost_increase)
+    failures.extend(plan_failures)
+    for operation_id, statement_costs in costs.items():
+        LOGGER.info(
+            "%-24s %2d statements, total plan cost %10.1f",
+            operation_id,
+            len(statement_costs),
+            sum(statement_costs),
+        )
+
+    if update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(costs, indent=2))
+        LOGGER.info("Wrote baseline to %s", baseline_path)
+    if failures:
+        raise click.ClickException(
+            f"{len(failures)} statement and query plan problems:\n"
+            + "\n".join(failures)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import statistics
+import subprocess
+import sys
+
+import rl.utils.click as click
+from rl.utils import LOGGER
+
+# Only the prep scripts need these, so importing the API must not pull them in
+_LAZY_MODULES = ("pyproj", "rl.utils.bucket", "s3fs", "svgwrite", "geopandas")
+
+_IMPORT_APP = "import worldle.api.main"
+_WARM_UP = (
+    "import time\n"
+    "from worldle.api.main import warm_up\n"
+    "start = time.perf_counter()\n"
+    "if not warm_up():\n"
+    "    raise SystemExit('Some caches failed to load')\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def _time_import() -> tuple[float, dict[str, float]]:
+    """Import the app in a fresh interpreter.
+
+    Returns the total import time and the cumulative time of each module imported,
+    both in seconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_APP],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative) / 1e6
+    return modules["worldle.api.main"], modules
+
+
+def _time_warm_up() -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", _WARM_UP], capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+@click.command()
+@click.option("-r", "--repeat", type=int, default=5, help="Imports to take median of")
+@click.option(
+    "--budget-ms",
+    type=float,
+    default=2000,
+    help="Maximum median time to import worldle.api.main",
+)
+@click.option(
+    "--warm/--no-warm",
+    default=False,
+    help="Also time filling the country data caches (needs the database)",
+)
+@click.option(
+    "--warm-budget-ms",
+    type=float,
+    default=3000,
+    help="Maximum time for the warmup to fill the caches",
+)
+@click.option("-n", "--top", type=int, default=15, help="Slowest imports to list")
+def main(
+    repeat: int, budget_ms: float, warm: bool, warm_budget_ms: float, top: int
+) -> None:
+    """Check how long a worker takes to import the app and warm up.
+
+    Each import runs in a fresh interpreter, as a gunicorn worker would. Fails
+    when the median import or the warmup is over budget, or when importing the
+    app pulls in a module that only the prep scripts need.
+    """
+    failures: list[str] = []
+    timings = [_time_import() for _ in range(repeat)]
+    import_ms = statistics.median(total for total, _ in timings) * 1000
+    modules = timings[-1][1]
+    LOGGER.info("Import worldle.api.main: %.0fms (median of %d)", import_ms, repeat)
+
+    top_level = {name: seconds for name, seconds in modules.items() if "." not in name}
+    for name, seconds in sorted(top_level.items(), key=lambda x: -x[1])[:top]:
+        LOGGER.info("  %-30s %8.1fms", name, seconds * 1000)
+
+    if import_ms > budget_ms:
+        failures.append(f"Import took {import_ms:.0f}ms, budget is {budget_ms:.0f}ms")
+    failures.extend(
+        f"Importing the app imports {name}" for name in _LAZY_MODULES if name in modules
+    )
+
+    if warm:
+        warm_ms = _time_warm_up() * 1000
+        LOGGER.info("Warm up: %.0fms", warm_ms)
+        if warm_ms > warm_budget_ms:
+            failures.append(
+                f"Warm up took {warm_ms:.0f}ms, budget is {warm_budget_ms:.0f}ms"
+            )
+
+    if failures:
+        raise click.ClickException(
+            f"{len(failures)} startup checks failed:\n" + "\n".join(failures)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Add user stats
+
+Revision ID: 8d3e2b71c4a9
+Revises: f9a1d895d156
+Create Date: 2026-10-18 11:03:52.118406
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3e2b71c4a9"
+down_revision: str | None = "f9a1d895d156"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_client_id", sa.Integer(), nullable=False),
+        sa.Column("num_played", sa.Integer(), nullable=False),
+        sa.Column("num_won", sa.Integer(), nullable=False),
+        sa.Column("current_streak", sa.Integer(), nullable=False),
+        sa.Column("max_streak", sa.Integer(), nullable=False),
+        sa.Column("guess_distribution", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["user_client_id"], ["user_clients.id"]),
+        sa.PrimaryKeyConstraint("user_client_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
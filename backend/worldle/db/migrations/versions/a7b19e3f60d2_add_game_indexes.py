@@ -0,0 +1,46 @@
+"""Add game indexes
+
+Revision ID: a7b19e3f60d2
+Revises: c5f0a4e9d217
+Create Date: 2026-10-18 13:40:15.902744
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7b19e3f60d2"
+down_revision: str | None = "c5f0a4e9d217"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # guesses.game_id lookups are already served by uq_guess_game_index
+    op.create_index(
+        "ix_games_user_client_id_created_at",
+        "games",
+        ["user_client_id", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_games_user_client_id_in_progress",
+        "games",
+        ["user_client_id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'in_progress'"),
+    )
+    op.create_index("ix_games_updated_at", "games", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_games_updated_at", table_name="games")
+    op.drop_index(
+        "ix_games_user_client_id_in_progress",
+        table_name="games",
+        postgresql_where=sa.text("status = 'in_progress'"),
+    )
+    op.drop_index("ix_games_user_client_id_created_at", table_name="games")
@@ -0,0 +1,69 @@
+"""Add country difficulty
+
+Revision ID: c5f0a4e9d217
+Revises: 8d3e2b71c4a9
+Create Date: 2026-10-18 12:21:07.550312
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5f0a4e9d217"
+down_revision: str | None = "8d3e2b71c4a9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("watermark", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.create_table(
+        "country_difficulty",
+        sa.Column("country_id", sa.Integer(), nullable=False),
+        sa.Column("num_finished", sa.Integer(), nullable=False),
+        sa.Column("num_won", sa.Integer(), nullable=False),
+        sa.Column("total_won_guesses", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["country_id"], ["countries.id"]),
+        sa.PrimaryKeyConstraint("country_id"),
+    )
+    op.create_table(
+        "country_first_guesses",
+        sa.Column("answer_country_id", sa.Integer(), nullable=False),
+        sa.Column("guessed_country_id", sa.Integer(), nullable=False),
+        sa.Column("num_guesses", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["answer_country_id"], ["countries.id"]),
+        sa.ForeignKeyConstraint(["guessed_country_id"], ["countries.id"]),
+        sa.PrimaryKeyConstraint("answer_country_id", "guessed_country_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("country_first_guesses")
+    op.drop_table("country_difficulty")
+    op.drop_table("rollup_watermarks")
@@ -0,0 +1,146 @@
+"""Add guess metric cols
+
+Revision ID: f9a1d895d156
+Revises: 32bd18ce7211
+Create Date: 2026-10-18 10:12:31.482913
+
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+import sqlalchemy as sa
+from alembic import op
+from pyproj import Geod
+
+# revision identifiers, used by Alembic.
+revision: str = "f9a1d895d156"
+down_revision: str | None = "32bd18ce7211"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_BACKFILL_BATCH_SIZE = 5_000
+
+# The metrics as the app computed them when this revision was written. They are
+# copied here so that later changes to the app can't change what this migration
+# does.
+_KM_PER_MILE = 1.609344
+_EARTH_MAX_DISTANCE_MILES = 12_450
+# Compass directions by 45° sector, counterclockwise from east
+_COMPASS_SECTORS = (
+    "EAST",
+    "NORTH_EAST",
+    "NORTH",
+    "NORTH_WEST",
+    "WEST",
+    "SOUTH_WEST",
+    "SOUTH",
+    "SOUTH_EAST",
+)
+
+
+def _guess_metrics(
+    geod: Geod,
+    from_lons: np.ndarray,
+    from_lats: np.ndarray,
+    to_lons: np.ndarray,
+    to_lats: np.ndarray,
+) -> dict[str, np.ndarray]:
+    # Geodesic distance on the WGS-84 ellipsoid
+    _, _, meters = geod.inv(from_lons, from_lats, to_lons, to_lats)
+    km = np.asarray(meters, dtype=float) / 1000
+    # Angle on a plate carrée projection, with 0° pointing east
+    bearing = np.mod(
+        np.degrees(np.arctan2(to_lats - from_lats, to_lons - from_lons)), 360
+    )
+    return {
+        "distance_km": km,
+        "distance_miles": km / _KM_PER_MILE,
+        "bearing": bearing,
+        "compass_sector": (np.mod(bearing + 22.5, 360) // 45).astype(int),
+        "proximity": 1 - np.minimum(km / _KM_PER_MILE / _EARTH_MAX_DISTANCE_MILES, 1),
+    }
+
+
+def _backfill_guess_metrics() -> None:
+    conn = op.get_bind()
+    points = {
+        country_id: (lon, lat)
+        for country_id, lon, lat in conn.execute(
+            sa.text(
+                "SELECT id, ST_X(geo_point), ST_Y(geo_point) FROM countries "
+                "WHERE geo_point IS NOT NULL"
+            )
+        )
+    }
+    if not points:
+        return
+    geod = Geod(ellps="WGS84")
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT guesses.id, guesses.guessed_country_id, "
+                "games.answer_country_id FROM guesses "
+                "JOIN games ON games.id = guesses.game_id "
+                "WHERE guesses.id > :last_id ORDER BY guesses.id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": _BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        located = [
+            (guess_id, points[guess], points[answer])
+            for guess_id, guess, answer in rows
+            if guess in points and answer in points
+        ]
+        if located:
+            from_points = np.array([guess for _, guess, _ in located], dtype=float)
+            to_points = np.array([answer for _, _, answer in located], dtype=float)
+            metrics = _guess_metrics(
+                geod,
+                from_points[:, 0],
+                from_points[:, 1],
+                to_points[:, 0],
+                to_points[:, 1],
+            )
+            conn.execute(
+                sa.text(
+                    "UPDATE guesses SET distance_km = :distance_km, "
+                    "distance_miles = :distance_miles, bearing = :bearing, "
+                    "compass_direction = :compass_direction, "
+                    "proximity = :proximity WHERE id = :id"
+                ),
+                [
+                    {
+                        "id": guess_id,
+                        "distance_km": float(metrics["distance_km"][i]),
+                        "distance_miles": float(metrics["distance_miles"][i]),
+                        "bearing": float(metrics["bearing"][i]),
+                        "compass_direction": _COMPASS_SECTORS[
+                            metrics["compass_sector"][i]
+                        ],
+                        "proximity": float(metrics["proximity"][i]),
+                    }
+                    for i, (guess_id, _, _) in enumerate(located)
+                ],
+            )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column("guesses", sa.Column("distance_km", sa.Float(), nullable=True))
+    op.add_column("guesses", sa.Column("distance_miles", sa.Float(), nullable=True))
+    op.add_column("guesses", sa.Column("bearing", sa.Float(), nullable=True))
+    op.add_column("guesses", sa.Column("compass_direction", sa.String(), nullable=True))
+    op.add_column("guesses", sa.Column("proximity", sa.Float(), nullable=True))
+    _backfill_guess_metrics()
+
+
+def downgrade() -> None:
+    op.drop_column("guesses", "proximity")
+    op.drop_column("guesses", "compass_direction")
+    op.drop_column("guesses", "bearing")
+    op.drop_column("guesses", "distance_miles")
+    op.drop_column("guesses", "distance_km")
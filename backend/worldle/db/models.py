@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import datetime
-import math
+from typing import TYPE_CHECKING
 
 import geoalchemy2 as ga
-import geopy.distance
-import rl.utils.bucket
-from shapely import Point
-from sqlalchemy import ForeignKey, String, UniqueConstraint, func
+from sqlalchemy import (
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -15,7 +21,12 @@ from sqlalchemy.orm import (
     relationship,
 )
 
-from worldle.utils.game import CompassDirection, GameStatus
+from worldle.utils.game import MAX_GUESSES, CompassDirection, GameStatus
+
+if TYPE_CHECKING:
+    from shapely import Point
+
+    from worldle.utils.geo import CountryPairMatrix
 
 
 class Base(DeclarativeBase):
@@ -58,6 +69,10 @@ class Country(TimestampMixin, Base):
 
     @property
     def svg_url(self) -> str:
+        # Imported here since the bucket client is slow to import and only needed
+        # when the country catalog is built
+        import rl.utils.bucket
+
         return rl.utils.bucket.get_public_url(self.svg_bucket_path)
 
     @property
@@ -72,20 +87,100 @@ class UserClient(TimestampMixin, Base):
     uuid: Mapped[str] = mapped_column(unique=True, index=True)
 
 
+class UserClientStats(TimestampMixin, Base):
+    """Running totals behind a user client's stats, updated as games finish."""
+
+    __tablename__ = "user_stats"
+
+    user_client_id: Mapped[int] = mapped_column(
+        ForeignKey("user_clients.id"), primary_key=True
+    )
+    num_played: Mapped[int] = mapped_column(default=0)
+    num_won: Mapped[int] = mapped_column(default=0)
+    current_streak: Mapped[int] = mapped_column(default=0)
+    max_streak: Mapped[int] = mapped_column(default=0)
+    # Number of games won in i + 1 guesses
+    guess_distribution: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer), default=lambda: [0] * MAX_GUESSES
+    )
+
+    def record_game(self, status: GameStatus, num_guesses: int) -> None:
+        self.num_played += 1
+        if status == GameStatus.WON:
+            self.num_won += 1
+            self.current_streak += 1
+            self.max_streak = max(self.max_streak, self.current_streak)
+            distribution = list(self.guess_distribution)
+            distribution[num_guesses - 1] += 1
+            self.guess_distribution = distribution
+        else:
+            self.current_streak = 0
+
+
+class RollupWatermark(TimestampMixin, Base):
+    """How far through ``games.updated_at`` an incremental rollup has processed."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    watermark: Mapped[datetime.datetime]
+
+
+class CountryDifficultyRollup(TimestampMixin, Base):
+    """Outcomes of finished games, aggregated by answer country."""
+
+    __tablename__ = "country_difficulty"
+
+    country_id: Mapped[int] = mapped_column(
+        ForeignKey("countries.id"), primary_key=True
+    )
+    num_finished: Mapped[int] = mapped_column(default=0)
+    num_won: Mapped[int] = mapped_column(default=0)
+    total_won_guesses: Mapped[int] = mapped_column(default=0)
+
+
+class CountryFirstGuessRollup(TimestampMixin, Base):
+    """How often each wrong first guess was made for each answer country."""
+
+    __tablename__ = "country_first_guesses"
+
+    answer_country_id: Mapped[int] = mapped_column(
+        ForeignKey("countries.id"), primary_key=True
+    )
+    guessed_country_id: Mapped[int] = mapped_column(
+        ForeignKey("countries.id"), primary_key=True
+    )
+    num_guesses: Mapped[int] = mapped_column(default=0)
+
+
 class Game(TimestampMixin, Base):
     __tablename__ = "games"
+    __table_args__ = (
+        # A user's games by recency (current game, recent answers, stats history)
+        Index("ix_games_user_client_id_created_at", "user_client_id", "created_at"),
+        # The (at most one) in-progress game per user
+        Index(
+            "ix_games_user_client_id_in_progress",
+            "user_client_id",
+            postgresql_where=text("status = 'in_progress'"),
+        ),
+        # Watermark scans for the difficulty rollups
+        Index("ix_games_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     answer_country_id: Mapped[int] = mapped_column(ForeignKey("countries.id"))
     user_client_id: Mapped[int] = mapped_column(ForeignKey("user_clients.id"))
     status: Mapped[GameStatus] = mapped_column(String(), default=GameStatus.IN_PROGRESS)
 
-    answer_country: Mapped[Country] = relationship(lazy="joined")
-    user_client: Mapped[UserClient] = relationship()
-    guesses: Mapped[list[Guess]] = relationship(back_populates="game", lazy="joined")
-
-
-EARTH_MAX_DISTANCE_MILES = 12_450  # Max distance between two points on Earth
+    # Relationships never load implicitly; queries choose what to load with loader
+    # options (see worldle.api.games), so a missing option fails loudly instead of
+    # turning into an N+1.
+    answer_country: Mapped[Country] = relationship(lazy="raise_on_sql")
+    user_client: Mapped[UserClient] = relationship(lazy="raise_on_sql")
+    guesses: Mapped[list[Guess]] = relationship(
+        back_populates="game", lazy="raise_on_sql", order_by="Guess.index"
+    )
 
 
 class Guess(TimestampMixin, Base):
@@ -97,69 +192,65 @@ class Guess(TimestampMixin, Base):
     guessed_country_id: Mapped[int] = mapped_column(ForeignKey("countries.id"))
     index: Mapped[int] = mapped_column()
 
-    game: Mapped[Game] = relationship(back_populates="guesses", lazy="joined")
-    guessed_country: Mapped[Country] = relationship()
+    # Metrics relative to the answer, filled in when the guess is created
+    distance_km: Mapped[float | None] = mapped_column()
+    distance_miles: Mapped[float | None] = mapped_column()
+    bearing: Mapped[float | None] = mapped_column()
+    compass_direction: Mapped[CompassDirection | None] = mapped_column(String())
+    proximity: Mapped[float | None] = mapped_column()
+
+    game: Mapped[Game] = relationship(back_populates="guesses", lazy="raise_on_sql")
+    guessed_country: Mapped[Country] = relationship(lazy="raise_on_sql")
 
     @property
     def is_correct(self) -> bool:
         return self.guessed_country_id == self.game.answer_country_id
 
-    @property
-    def distance_to_answer(self) -> geopy.distance.geodesic:
-        guess_point = (
-            self.guessed_country.geo_point_shp.y,
-            self.guessed_country.geo_point_shp.x,
-        )
-        answer_point = (
-            self.game.answer_country.geo_point_shp.y,
-            self.game.answer_country.geo_point_shp.x,
-        )
-        return geopy.distance.geodesic(guess_point, answer_point)
-
     @property
     def distance_to_answer_miles(self) -> float:
-        return self.distance_to_answer.miles
+        if self.distance_miles is not None:
+            return self.distance_miles
+        return self._pair_matrix.distance_miles(*self._answer_pair)
 
     @property
     def distance_to_answer_km(self) -> float:
-        return self.distance_to_answer.km
+        if self.distance_km is not None:
+            return self.distance_km
+        return self._pair_matrix.distance_km(*self._answer_pair)
 
     @property
     def bearing_to_answer(self) -> float:
-        guess = self.guessed_country.geo_point_shp
-        answer = self.game.answer_country.geo_point_shp
-
-        # Convert to Mercator-like coordinates (treating -180,-90 as origin)
-        x1, y1 = guess.x + 180, guess.y + 90
-        x2, y2 = answer.x + 180, answer.y + 90
-
-        # Calculate angle in degrees
-        angle = math.degrees(math.atan2(y2 - y1, x2 - x1))
-        return angle % 360
+        if self.bearing is not None:
+            return self.bearing
+        return self._pair_matrix.bearing_degrees(*self._answer_pair)
 
     @property
     def compass_direction_to_answer(self) -> CompassDirection:
-        angle = self.bearing_to_answer
-        if 22.5 <= angle < 67.5:
-            return CompassDirection.NORTH_EAST
-        elif 67.5 <= angle < 112.5:
-            return CompassDirection.NORTH
-        elif 112.5 <= angle < 157.5:
-            return CompassDirection.NORTH_WEST
-        elif 157.5 <= angle < 202.5:
-            return CompassDirection.WEST
-        elif 202.5 <= angle < 247.5:
-            return CompassDirection.SOUTH_WEST
-        elif 247.5 <= angle < 292.5:
-            return CompassDirection.SOUTH
-        elif 292.5 <= angle < 337.5:
-            return CompassDirection.SOUTH_EAST
-        else:
-            return CompassDirection.EAST
+        if self.compass_direction is not None:
+            return CompassDirection(self.compass_direction)
+        return self._pair_matrix.compass_direction(*self._answer_pair)
 
     @property
     def proximity_prop(self) -> float:
-        normalized_distance = min(
-            self.distance_to_answer_miles / EARTH_MAX_DISTANCE_MILES, 1
-        )
-        return 1 - normalized_distance
+        if self.proximity is not None:
+            return self.proximity
+        return self._pair_matrix.proximity_prop(*self._answer_pair)
+
+    def fill_metrics(self) -> None:
+        matrix = self._pair_matrix
+        self.distance_km = matrix.distance_km(*self._answer_pair)
+        self.distance_miles = matrix.distance_miles(*self._answer_pair)
+        self.bearing = matrix.bearing_degrees(*self._answer_pair)
+        self.compass_direction = matrix.compass_direction(*self._answer_pair)
+        self.proximity = matrix.proximity_prop(*self._answer_pair)
+
+    @property
+    def _answer_pair(self) -> tuple[int, int]:
+        return self.guessed_country_id, self.game.answer_country_id
+
+    @property
+    def _pair_matrix(self) -> CountryPairMatrix:
+        # Imported here since building the matrix itself queries Country
+        from worldle.utils.geo import get_pair_matrix
+
+        return get_pair_matrix(*self._answer_pair)
@@ -1,8 +1,24 @@
+import contextlib
+import os
+import threading
+import time
 import urllib.parse
+from collections.abc import Iterator
+from typing import Any
 
 import rl.utils.io
 import sqlalchemy as sa
-from sqlalchemy.orm import sessionmaker
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from worldle.db.slow_queries import install_slow_query_log
 
 
 def get_postgres_uri(
@@ -32,19 +48,202 @@ def get_postgres_uri(
     )
 
 
-def get_engine(
-    **uri_kwargs,
-):
-    return sa.create_engine(
+class InstrumentedQueuePool(QueuePool):
+    """A QueuePool that records how long callers wait to check out a connection.
+
+    Only checkouts that find no idle connection and no room to open another are
+    counted, since those are the ones that block until a connection is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _at_capacity(self) -> bool:
+        return (
+            self.checkedin() == 0
+            and self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+        )
+
+    def _do_get(self):
+        if not self._at_capacity():
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolStats(BaseModel):
+    pool_size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    wait_count: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+
+def _create_engine(**uri_kwargs) -> sa.Engine:
+    engine = sa.create_engine(
         get_postgres_uri(**uri_kwargs),
         echo=rl.utils.io.getenv("SA_ECHO", "false").lower() == "true",
+        poolclass=InstrumentedQueuePool,
         pool_size=int(rl.utils.io.getenv("SA_POOL_SIZE", "20")),
         max_overflow=int(rl.utils.io.getenv("SA_MAX_OVERFLOW", "30")),
     )
+    install_slow_query_log(engine)
+    return engine
+
+
+# One engine (and so one connection pool) per process, created on first use.
+_ENGINE: sa.Engine | None = None
+_SESSION_FACTORY: sessionmaker[Session] | None = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def _reset_engine_after_fork() -> None:
+    # Connections inherited from the parent (e.g. a gunicorn master that imported
+    # the app with --preload) must not be shared with the child, so give the
+    # child a fresh pool without closing the parent's sockets.
+    if _ENGINE is not None:
+        _ENGINE.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_engine_after_fork)
+
+
+def get_engine(
+    **uri_kwargs,
+) -> sa.Engine:
+    """Return the process-wide engine, or a new one if connection args are given."""
+    global _ENGINE
+    if uri_kwargs:
+        return _create_engine(**uri_kwargs)
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = _create_engine()
+    return _ENGINE
+
+
+def get_session_factory() -> sessionmaker[Session]:
+    global _SESSION_FACTORY
+    if _SESSION_FACTORY is None:
+        engine = get_engine()
+        with _ENGINE_LOCK:
+            if _SESSION_FACTORY is None:
+                _SESSION_FACTORY = sessionmaker(bind=engine)
+    return _SESSION_FACTORY
 
 
 def get_session(
     **engine_kwargs,
-):
-    engine = get_engine(**engine_kwargs)
-    return sessionmaker(bind=engine)()
+) -> Session:
+    if engine_kwargs:
+        return sessionmaker(bind=get_engine(**engine_kwargs))()
+    return get_session_factory()()
+
+
+def get_pool_stats(engine: sa.Engine | AsyncEngine | None = None) -> PoolStats:
+    pool = (engine or get_engine()).pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        raise TypeError(f"Pool stats are unavailable for {type(pool).__name__}")
+    return PoolStats(
+        pool_size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        wait_count=pool.wait_count,
+        total_wait_seconds=pool.total_wait_seconds,
+        max_wait_seconds=pool.max_wait_seconds,
+    )
+
+
+def get_async_postgres_uri(**uri_kwargs) -> str:
+    return get_postgres_uri(**uri_kwargs).replace(
+        "postgresql://", "postgresql+asyncpg://", 1
+    )
+
+
+def _create_async_engine(**uri_kwargs) -> AsyncEngine:
+    engine = create_async_engine(
+        get_async_postgres_uri(**uri_kwargs),
+        echo=rl.utils.io.getenv("SA_ECHO", "false").lower() == "true",
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=int(rl.utils.io.getenv("SA_POOL_SIZE", "20")),
+        max_overflow=int(rl.utils.io.getenv("SA_MAX_OVERFLOW", "30")),
+    )
+    install_slow_query_log(engine.sync_engine)
+    return engine
+
+
+_ASYNC_ENGINE: AsyncEngine | None = None
+_ASYNC_SESSION_FACTORY: async_sessionmaker[AsyncSession] | None = None
+
+
+def _reset_async_engine_after_fork() -> None:
+    if _ASYNC_ENGINE is not None:
+        _ASYNC_ENGINE.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_async_engine_after_fork)
+
+
+def get_async_engine(**uri_kwargs) -> AsyncEngine:
+    """Async counterpart of get_engine(), backed by asyncpg."""
+    global _ASYNC_ENGINE
+    if uri_kwargs:
+        return _create_async_engine(**uri_kwargs)
+    if _ASYNC_ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ASYNC_ENGINE is None:
+                _ASYNC_ENGINE = _create_async_engine()
+    return _ASYNC_ENGINE
+
+
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    global _ASYNC_SESSION_FACTORY
+    if _ASYNC_SESSION_FACTORY is None:
+        engine = get_async_engine()
+        with _ENGINE_LOCK:
+            if _ASYNC_SESSION_FACTORY is None:
+                _ASYNC_SESSION_FACTORY = async_sessionmaker(bind=engine)
+    return _ASYNC_SESSION_FACTORY
+
+
+def get_async_session(**engine_kwargs) -> AsyncSession:
+    if engine_kwargs:
+        return async_sessionmaker(bind=get_async_engine(**engine_kwargs))()
+    return get_async_session_factory()()
+
+
+@contextlib.contextmanager
+def capture_statements(
+    engine: sa.Engine | None = None,
+) -> Iterator[list[tuple[str, Any]]]:
+    """Collect the (statement, parameters) pairs an engine executes in the block."""
+    engine = engine or get_engine()
+    statements: list[tuple[str, Any]] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append((statement, parameters))
+
+    sa.event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,128 @@
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+import rl.utils.io
+import sqlalchemy as sa
+from rl.utils import LOGGER
+
+# Statements slower than this many milliseconds are logged; unset, empty or 0 disables
+SLOW_QUERY_MS = float(rl.utils.io.getenv("WORLDLE_SLOW_QUERY_MS", "0") or 0)
+# Fraction of slow SELECTs that are re-run under EXPLAIN (ANALYZE, BUFFERS)
+SLOW_QUERY_EXPLAIN_RATE = float(
+    rl.utils.io.getenv("WORLDLE_SLOW_QUERY_EXPLAIN_RATE", "0.1") or 0.1
+)
+SLOW_QUERY_LOG_PATH = rl.utils.io.getenv(
+    "WORLDLE_SLOW_QUERY_LOG_PATH",
+    str(rl.utils.io.get_data_path("logs", "slow_queries.log")),
+)
+_LOG_MAX_BYTES = 10 * 1024 * 1024
+_LOG_BACKUP_COUNT = 5
+
+# What issued the current statement, e.g. "POST /games/12/guesses"; set per request
+# by worldle.api.metrics.MetricsMiddleware
+query_origin: ContextVar[str | None] = ContextVar("worldle_query_origin", default=None)
+
+_logger = logging.getLogger("worldle.slow_queries")
+_logger_lock = threading.Lock()
+_logger_pid: int | None = None
+
+
+def _get_logger() -> logging.Logger:
+    """The slow query logger, with its file opened lazily in each (forked) process."""
+    global _logger_pid
+    if _logger_pid != os.getpid():
+        with _logger_lock:
+            if _logger_pid != os.getpid():
+                for handler in list(_logger.handlers):
+                    _logger.removeHandler(handler)
+                Path(SLOW_QUERY_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+                _logger.addHandler(
+                    logging.handlers.RotatingFileHandler(
+                        SLOW_QUERY_LOG_PATH,
+                        maxBytes=_LOG_MAX_BYTES,
+                        backupCount=_LOG_BACKUP_COUNT,
+                    )
+                )
+                _logger.setLevel(logging.INFO)
+                _logger.propagate = False
+                _logger_pid = os.getpid()
+    return _logger
+
+
+def _explain(conn: sa.Connection, statement: str, parameters) -> list[str] | None:
+    """EXPLAIN ANALYZE a SELECT on the connection that ran it, inside a savepoint.
+
+    The savepoint keeps a failing EXPLAIN from aborting the caller's transaction.
+    The DBAPI connection is used directly so this doesn't re-enter the listeners.
+    """
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT worldle_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT worldle_explain")
+            cursor.execute("RELEASE SAVEPOINT worldle_explain")
+        return plan
+    except Exception:
+        LOGGER.exception("Couldn't EXPLAIN slow query")
+        return None
+    finally:
+        cursor.close()
+
+
+# The start time goes on the statement's execution context rather than the
+# connection, since after_cursor_execute doesn't fire for a statement that raises
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context._worldle_slow_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    duration_ms = (time.perf_counter() - context._worldle_slow_query_start) * 1000
+    if duration_ms < SLOW_QUERY_MS:
+        return
+
+    plan = None
+    if (
+        not many
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and random.random() < SLOW_QUERY_EXPLAIN_RATE
+    ):
+        plan = _explain(conn, statement, parameters)
+    _get_logger().info(
+        json.dumps(
+            {
+                "time": datetime.datetime.now(datetime.UTC).isoformat(),
+                "pid": os.getpid(),
+                "duration_ms": round(duration_ms, 3),
+                "origin": query_origin.get(),
+                "statement": statement,
+                "parameters": parameters,
+                "plan": plan,
+            },
+            default=str,
+        )
+    )
+
+
+def install_slow_query_log(engine: sa.Engine) -> None:
+    """Log this engine's statements slower than WORLDLE_SLOW_QUERY_MS, if set.
+
+    Each entry is a JSON line with the statement, its bound parameters, the
+    request it came from and, for a sampled fraction of SELECTs, its
+    EXPLAIN (ANALYZE, BUFFERS) output. ANALYZE runs the statement a second time,
+    which is why only SELECTs are sampled.
+    """
+    if SLOW_QUERY_MS <= 0:
+        return
+    sa.event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    sa.event.listen(engine, "after_cursor_execute", _after_cursor_execute)
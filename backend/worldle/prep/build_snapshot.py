@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import rl.utils.click as click
+from rl.utils import LOGGER
+
+from worldle.api.catalog import build_country_catalog, write_country_catalog
+from worldle.db.session import get_session
+from worldle.utils.cache import get_countries_version
+from worldle.utils.geo import load_pair_matrix, write_pair_matrix
+from worldle.utils.snapshot import SNAPSHOT_DIR, SnapshotWriter
+
+
+def publish_snapshot(root: str | Path = SNAPSHOT_DIR) -> Path:
+    """Build the country catalog and pair matrix and publish them for the workers."""
+    with get_session() as session:
+        writer = SnapshotWriter(get_countries_version(session), root)
+        write_country_catalog(build_country_catalog(session), writer)
+        write_pair_matrix(load_pair_matrix(session), writer)
+    path = writer.publish()
+    LOGGER.info("Published snapshot %s (countries version %s)", path, writer.version)
+    return path
+
+
+@click.command()
+@click.option(
+    "-r",
+    "--root",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=SNAPSHOT_DIR or None,
+    required=True,
+    help="Snapshot directory (defaults to WORLDLE_SNAPSHOT_DIR)",
+)
+def main(root: Path) -> None:
+    """Publish a shared snapshot of country data for the API workers to map.
+
+    Run this after anything that changes the countries table. Workers pick the
+    new snapshot up within WORLDLE_COUNTRY_DATA_CHECK_INTERVAL seconds, and load
+    country data from the database instead until it is published.
+    """
+    publish_snapshot(root)
+
+
+if __name__ == "__main__":
+    main()
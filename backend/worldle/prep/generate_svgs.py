@@ -1,23 +1,40 @@
+import csv
+import functools
+import json
+import os
+from dataclasses import asdict, dataclass
 from pathlib import Path
 
+import numpy as np
 import rl.utils.bucket as bucket_utils
 import rl.utils.click as click
 import rl.utils.io
 import s3fs
 import shapely
-import shapely.ops
 import svgwrite
 import tqdm
 from pyproj import Transformer
-from sqlalchemy import select
-from tqdm.contrib.concurrent import thread_map
+from rl.utils import LOGGER
+from sqlalchemy import func, select, update
+from tqdm.contrib.concurrent import process_map, thread_map
 
 import worldle.utils.image as image_utils
 from worldle.db.models import Country
 from worldle.db.session import get_session
+from worldle.prep.build_snapshot import publish_snapshot
+from worldle.utils.snapshot import SNAPSHOT_DIR
 
 _DEFAULT_SVG_DIR = rl.utils.io.get_data_path("country_svgs")
 _TARGET_SIZE = 256  # pixels for the longer dimension
+# Coordinates are rounded to this fraction of a pixel, and detail smaller than the
+# simplification tolerance is dropped. The image is shown at ~250 CSS pixels, so
+# both stay under a device pixel on 2x screens.
+_GRID_PER_PX = 4
+_TOLERANCE_PX = 0.25
+# Bump whenever a change to this module changes the SVGs it writes, so that the
+# manifest stops treating every country as up to date
+_GENERATOR_VERSION = 1
+_MANIFEST_NAME = "manifest.json"
 
 # Create transformer from WGS84 (EPSG:4326) to Web Mercator (EPSG:3857)
 _TRANSFORMER = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
@@ -28,37 +45,203 @@ def _upload_svg(args: tuple[Path, str, s3fs.S3FileSystem]) -> None:
     bucket_utils.write_file(svg_path, bucket_path, fs)
 
 
-def _generate_svg(country: Country, output_dir: Path) -> tuple[Path, str]:
-    geom = shapely.wkb.loads(bytes(country.geometry.data))
-    # Project the geometry to Web Mercator
-    projected_geom = shapely.ops.transform(
-        lambda x, y: _TRANSFORMER.transform(x, y), geom
+def _project(coords: np.ndarray) -> np.ndarray:
+    x, y = _TRANSFORMER.transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
+
+
+def _full_precision_path_data(geom: shapely.MultiPolygon) -> str:
+    """The path the unsimplified SVGs had, for comparison in the size report."""
+    rings = shapely.get_exterior_ring(shapely.get_parts(geom))
+    coords = shapely.get_coordinates(rings)
+    points = list(map("{},{}".format, coords[:, 0].tolist(), (-coords[:, 1]).tolist()))
+    ends = np.cumsum(shapely.get_num_coordinates(rings)).tolist()
+    starts = [0, *ends[:-1]]
+    return "".join(
+        f"M {points[start]} L " + " L ".join(points[start + 1 : end]) + " Z "
+        for start, end in zip(starts, ends, strict=True)
     )
 
-    minx, miny, maxx, maxy = projected_geom.bounds
-    width = maxx - minx
-    height = maxy - miny
 
+def _ring_path(grid_coords: np.ndarray) -> str | None:
+    """A closed subpath of relative moves between a ring's grid coordinates.
+
+    Moves that round to nothing are dropped, as is a ring left with fewer than
+    three distinct points.
+    """
+    # The closing point is implied by z
+    deltas = np.diff(grid_coords[:-1], axis=0)
+    deltas = deltas[(deltas != 0).any(axis=1)]
+    if len(deltas) < 2:
+        return None
+    x, y = grid_coords[0].tolist()
+    return f"M{x} {y}l" + " ".join(map(str, deltas.ravel().tolist())) + "z"
+
+
+def _path_data(polygons: np.ndarray, origin: tuple[float, float], scale: float) -> str:
+    """An SVG path through every polygon's rings on the quantized grid.
+
+    Holes are subpaths too, so the path needs fill-rule="evenodd". y is flipped to
+    point down, from ``origin`` (the top left corner).
+    """
+    minx, maxy = origin
+    subpaths = []
+    for polygon in polygons:
+        rings = [polygon.exterior, *polygon.interiors]
+        for i, ring in enumerate(rings):
+            coords = shapely.get_coordinates(ring)
+            grid_coords = np.rint(
+                np.column_stack([coords[:, 0] - minx, maxy - coords[:, 1]]) * scale
+            ).astype(np.int64)
+            subpath = _ring_path(grid_coords)
+            if subpath is None and i == 0:
+                # The polygon is smaller than a grid cell, so are its holes
+                break
+            if subpath is not None:
+                subpaths.append(subpath)
+    # A minus sign separates numbers on its own
+    return "".join(subpaths).replace(" -", "-")
+
+
+def _drawing(view_box: str, path_data: str, **path_extra) -> svgwrite.Drawing:
+    # Validating the path data would take longer than generating it
     dwg = svgwrite.Drawing(
         size=(f"{_TARGET_SIZE}px", f"{_TARGET_SIZE}px"),
-        viewBox=f"{minx} {-maxy} {width} {height}",
+        viewBox=view_box,
+        debug=False,
     )
+    dwg.add(dwg.path(d=path_data, fill="black", **path_extra))
+    return dwg
+
+
+@dataclass(frozen=True)
+class _SvgStats:
+    iso3: str
+    full_vertices: int
+    vertices: int
+    full_bytes: int
+    bytes: int
+    # Relative change in area from simplification
+    area_error: float
 
-    path_data = ""
-    for polygon in projected_geom.geoms:
-        coords = list(polygon.exterior.coords)
-        path_data += f"M {coords[0][0]},{-coords[0][1]} "
-        path_data += " ".join(f"L {x},{-y}" for x, y in coords[1:])
-        path_data += " Z "
 
-    dwg.add(dwg.path(d=path_data, fill="black"))
+@dataclass(frozen=True)
+class _SvgResult:
+    path: Path
+    sha1: str | None
+    stats: _SvgStats | None = None
 
-    output_path = output_dir / f"{country.iso3}.svg"
+
+def _generate_svg(
+    iso3: str,
+    geometry_wkb: bytes,
+    output_dir: Path,
+    tolerance_px: float = _TOLERANCE_PX,
+    report: bool = False,
+) -> _SvgResult:
+    geom = shapely.from_wkb(geometry_wkb)
+    # Project every vertex to Web Mercator at once
+    projected_geom = shapely.transform(geom, _project)
+
+    minx, miny, maxx, maxy = projected_geom.bounds
+    width = maxx - minx
+    height = maxy - miny
+    px_per_unit = _TARGET_SIZE / max(width, height)
+
+    # Each polygon keeps its holes inside it. Preserving topology across the
+    # whole geometry too would keep far more vertices, and take several times
+    # longer for archipelagos, just to stop islands touching below a pixel.
+    polygons = shapely.simplify(
+        shapely.get_parts(projected_geom),
+        tolerance_px / px_per_unit,
+        preserve_topology=True,
+    )
+    scale = px_per_unit * _GRID_PER_PX
+    dwg = _drawing(
+        f"0 0 {round(width * scale)} {round(height * scale)}",
+        _path_data(polygons, (minx, maxy), scale),
+        fill_rule="evenodd",
+    )
+
+    output_path = output_dir / f"{iso3}.svg"
     dwg.saveas(output_path)
     file_sha1 = image_utils.get_file_sha1(output_path)
-    if file_sha1 is None:
-        return output_path, None
-    return output_path, file_sha1
+
+    stats = None
+    if report:
+        full_dwg = _drawing(
+            f"{minx} {-maxy} {width} {height}",
+            _full_precision_path_data(projected_geom),
+        )
+        stats = _SvgStats(
+            iso3=iso3,
+            full_vertices=int(shapely.get_num_coordinates(projected_geom)),
+            vertices=int(shapely.get_num_coordinates(polygons).sum()),
+            full_bytes=len(full_dwg.tostring().encode()),
+            bytes=output_path.stat().st_size,
+            area_error=abs(shapely.area(polygons).sum() / projected_geom.area - 1),
+        )
+    return _SvgResult(output_path, file_sha1, stats)
+
+
+def _write_report(
+    results: list[_SvgResult], report_path: Path, num_countries: int
+) -> None:
+    """Write sizes and simplification error for the countries regenerated this run.
+
+    Without --force that's only the changed countries, and so are the totals.
+    """
+    stats = sorted(
+        (result.stats for result in results if result.stats),
+        key=lambda stats: -stats.full_bytes,
+    )
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with report_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(_SvgStats.__dataclass_fields__))
+        writer.writeheader()
+        writer.writerows(asdict(row) for row in stats)
+
+    LOGGER.info(
+        "Wrote a report on %d of %d countries to %s%s",
+        len(stats),
+        num_countries,
+        report_path,
+        " (pass --force to cover all of them)" if len(stats) < num_countries else "",
+    )
+    if not stats:
+        return
+
+    full_bytes = sum(row.full_bytes for row in stats)
+    total_bytes = sum(row.bytes for row in stats)
+    LOGGER.info(
+        "SVGs take %d bytes instead of %d (%.1f%% smaller); max area error %.3f%%",
+        total_bytes,
+        full_bytes,
+        (1 - total_bytes / full_bytes) * 100 if full_bytes else 0,
+        max((row.area_error for row in stats), default=0) * 100,
+    )
+    for row in stats[:10]:
+        LOGGER.info(
+            "  %-4s %10d -> %8d bytes  %8d -> %6d vertices",
+            row.iso3,
+            row.full_bytes,
+            row.bytes,
+            row.full_vertices,
+            row.vertices,
+        )
+
+
+def _read_manifest(manifest_path: Path) -> dict[str, dict]:
+    """Per country id: the input key its SVG was generated from, and its bucket path."""
+    if not manifest_path.exists():
+        return {}
+    return json.loads(manifest_path.read_text())["countries"]
+
+
+def _write_manifest(manifest_path: Path, countries: dict[str, dict]) -> None:
+    tmp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"countries": countries}, indent=2, sort_keys=True))
+    tmp_path.replace(manifest_path)
 
 
 @click.command()
@@ -69,30 +252,156 @@ def _generate_svg(country: Country, output_dir: Path) -> tuple[Path, str]:
     default=_DEFAULT_SVG_DIR,
     help="Directory to save SVG files",
 )
-def main(output_dir: Path) -> None:
-    """Generate SVG files for each country's geometry."""
+@click.option(
+    "-j",
+    "--workers",
+    type=int,
+    default=os.cpu_count() or 1,
+    help="Processes to generate SVGs in (1 generates them in this process)",
+)
+@click.option(
+    "-t",
+    "--tolerance-px",
+    type=float,
+    default=_TOLERANCE_PX,
+    help="Simplify away detail smaller than this many pixels of the image",
+)
+@click.option(
+    "-r",
+    "--report-path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Write sizes and simplification error as CSV for each country regenerated "
+        "(every country with --force)"
+    ),
+)
+@click.option(
+    "-f",
+    "--force",
+    is_flag=True,
+    help="Regenerate every country, not just those whose geometry changed",
+)
+def main(
+    output_dir: Path,
+    workers: int,
+    tolerance_px: float,
+    report_path: Path | None,
+    force: bool,
+) -> None:
+    """Generate SVG files for each country's geometry.
+
+    Geometries are simplified to the image's resolution and drawn on a
+    quarter-pixel grid, which keeps large coastlines small enough to download
+    with every game.
+
+    Only countries whose geometry, ISO code or generator settings changed since
+    the last run are regenerated, according to a manifest in the output
+    directory. Their geometries are hashed in the database, so unchanged ones
+    are never fetched.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
-    fs = bucket_utils.get_bucket_fs()
-    upload_args = []
-    existing_hashes = image_utils.get_existing_image_sha1s(fs)
+    manifest_path = output_dir / _MANIFEST_NAME
+    manifest = _read_manifest(manifest_path)
+    settings = f"v{_GENERATOR_VERSION}:{_TARGET_SIZE}:{_GRID_PER_PX}:{tolerance_px}"
 
     with get_session() as session:
-        stmt = select(Country).where(Country.iso3.is_not(None))
-        countries = session.execute(stmt).scalars().all()
-
-        for country in tqdm.tqdm(countries, desc="Generating SVGs"):
-            svg_path, sha1 = _generate_svg(country, output_dir)
-            if sha1 is None:
-                country.svg_bucket_path = None
-                continue
-            bucket_path = image_utils.get_image_bucket_path(sha1)
-            if sha1 not in existing_hashes:
-                upload_args.append((svg_path, bucket_path, fs))
-            country.svg_bucket_path = bucket_path
+        rows = session.execute(
+            select(
+                Country.id,
+                Country.iso3,
+                func.md5(func.ST_AsBinary(Country.geometry)),
+                Country.svg_bucket_path,
+            )
+            .where(Country.iso3.is_not(None))
+            .order_by(Country.id)
+        ).all()
+
+        countries = {}
+        stale = {}
+        for country_id, iso3, geometry_md5, svg_bucket_path in rows:
+            key = f"{iso3}:{geometry_md5}:{settings}"
+            entry = manifest.get(str(country_id))
+            if (
+                not force
+                and entry is not None
+                and entry["key"] == key
+                # e.g. the database was restored from before the last run
+                and entry["svg_bucket_path"] == svg_bucket_path
+            ):
+                countries[str(country_id)] = entry
+            else:
+                stale[country_id] = (iso3, key)
+        LOGGER.info("%d of %d countries need new SVGs", len(stale), len(rows))
+        if not stale:
+            _write_manifest(manifest_path, countries)
+            if report_path:
+                _write_report([], report_path, len(rows))
+            return
+
+        geometry_wkbs = dict(
+            session.execute(
+                select(Country.id, func.ST_AsBinary(Country.geometry)).where(
+                    Country.id.in_(stale)
+                )
+            ).all()
+        )
+        country_ids = list(stale)
+        iso3s = [stale[country_id][0] for country_id in country_ids]
+        wkbs = [bytes(geometry_wkbs[country_id]) for country_id in country_ids]
+        generate = functools.partial(
+            _generate_svg,
+            output_dir=output_dir,
+            tolerance_px=tolerance_px,
+            report=report_path is not None,
+        )
+
+        if workers > 1 and len(country_ids) > 1:
+            results = process_map(
+                generate,
+                iso3s,
+                wkbs,
+                max_workers=workers,
+                chunksize=4,
+                desc="Generating SVGs",
+            )
+        else:
+            results = [
+                generate(iso3, wkb)
+                for iso3, wkb in tqdm.tqdm(
+                    zip(iso3s, wkbs, strict=True),
+                    total=len(country_ids),
+                    desc="Generating SVGs",
+                )
+            ]
+
+        fs = bucket_utils.get_bucket_fs()
+        existing_hashes = image_utils.get_existing_image_sha1s(fs)
+        upload_args = []
+        svg_bucket_paths = []
+        for country_id, result in zip(country_ids, results, strict=True):
+            bucket_path = None
+            if result.sha1 is not None:
+                bucket_path = image_utils.get_image_bucket_path(result.sha1)
+                if result.sha1 not in existing_hashes:
+                    upload_args.append((result.path, bucket_path, fs))
+            svg_bucket_paths.append({"id": country_id, "svg_bucket_path": bucket_path})
+            countries[str(country_id)] = {
+                "key": stale[country_id][1],
+                "svg_bucket_path": bucket_path,
+            }
 
         if upload_args:
             thread_map(_upload_svg, upload_args, desc="Uploading SVGs", max_workers=8)
+        session.execute(update(Country), svg_bucket_paths)
         session.commit()
+    # Only once the database has the new paths, so a failed run is retried
+    _write_manifest(manifest_path, countries)
+
+    if report_path:
+        _write_report(results, report_path, len(rows))
+    if SNAPSHOT_DIR:
+        publish_snapshot()
 
 
 if __name__ == "__main__":
@@ -12,6 +12,8 @@ from sqlalchemy.orm import Session
 
 from worldle.db.models import Country
 from worldle.db.session import get_session
+from worldle.prep.build_snapshot import publish_snapshot
+from worldle.utils.snapshot import SNAPSHOT_DIR
 
 _DEFAULT_COUNTRIES_PATH = rl.utils.io.get_data_path(
     "raw", "world_administrative_boundaries.json"
@@ -94,6 +96,9 @@ def main(countries_path: Path) -> None:
         LOGGER.info("Ingesting %d countries", len(data))
         _ingest_countries(data, session)
 
+    if SNAPSHOT_DIR:
+        publish_snapshot()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,84 @@
+import itertools
+from collections.abc import Iterator
+
+import rl.utils.click as click
+import tqdm
+from rl.utils import LOGGER
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from worldle.db.models import Game, GameStatus, Guess, UserClientStats
+from worldle.db.session import get_session
+from worldle.utils.stats import GameOutcome, compute_user_stats, stats_row_values
+
+
+def _iter_user_outcomes(session: Session) -> Iterator[tuple[int, list[GameOutcome]]]:
+    rows = session.execute(
+        select(Game.user_client_id, Game.status, func.count(Guess.id))
+        .join(Guess, Guess.game_id == Game.id)
+        .group_by(Game.id)
+        .order_by(Game.user_client_id, Game.created_at.asc())
+        .execution_options(yield_per=10_000)
+    )
+    for user_client_id, user_rows in itertools.groupby(rows, key=lambda r: r[0]):
+        yield (
+            user_client_id,
+            [GameOutcome(GameStatus(status), n) for _, status, n in user_rows],
+        )
+
+
+def _upsert_user_stats(rows: list[dict], session: Session) -> None:
+    stmt = insert(UserClientStats).values(rows)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserClientStats.user_client_id],
+            set_={col: stmt.excluded[col] for col in rows[0] if col != "user_client_id"}
+            | {"updated_at": func.now()},
+        )
+    )
+
+
+def _rebuild_user_stats(session: Session, batch_size: int) -> int:
+    num_users = 0
+    batch: list[dict] = []
+    # Read history on a separate session so that committing batches doesn't
+    # close the streaming cursor
+    with get_session() as read_session:
+        for user_client_id, outcomes in tqdm.tqdm(
+            _iter_user_outcomes(read_session), desc="Rebuilding user stats"
+        ):
+            batch.append(stats_row_values(user_client_id, compute_user_stats(outcomes)))
+            if len(batch) >= batch_size:
+                _upsert_user_stats(batch, session)
+                session.commit()
+                num_users += len(batch)
+                batch = []
+    if batch:
+        _upsert_user_stats(batch, session)
+        session.commit()
+        num_users += len(batch)
+    return num_users
+
+
+@click.command()
+@click.option(
+    "-b",
+    "--batch-size",
+    type=int,
+    default=1_000,
+    help="Number of user stats rows to write per transaction",
+)
+def main(batch_size: int) -> None:
+    """Rebuild the user_stats table from every user's game history.
+
+    Games that finish while this runs may be overwritten by the rebuilt rows, so
+    run it during low traffic.
+    """
+    with get_session() as session:
+        num_users = _rebuild_user_stats(session, batch_size)
+    LOGGER.info("Rebuilt stats for %d user clients", num_users)
+
+
+if __name__ == "__main__":
+    main()
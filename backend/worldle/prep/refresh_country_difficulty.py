@@ -0,0 +1,33 @@
+import datetime
+
+import rl.utils.click as click
+from rl.utils import LOGGER
+
+from worldle.db.session import get_session
+from worldle.utils.difficulty import refresh_country_difficulty
+
+
+@click.command()
+@click.option(
+    "-l",
+    "--lag-minutes",
+    type=int,
+    default=5,
+    help="Only include games last updated at least this many minutes ago",
+)
+@click.option(
+    "--full",
+    is_flag=True,
+    help="Discard the rollups and rebuild them from every finished game",
+)
+def main(lag_minutes: int, full: bool) -> None:
+    """Fold recently finished games into the per-country difficulty rollups."""
+    with get_session() as session:
+        num_games = refresh_country_difficulty(
+            session, datetime.timedelta(minutes=lag_minutes), full=full
+        )
+    LOGGER.info("Folded %d finished games into country difficulty", num_games)
+
+
+if __name__ == "__main__":
+    main()
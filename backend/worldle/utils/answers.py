@@ -0,0 +1,125 @@
+import datetime
+import hashlib
+import random
+from collections.abc import Collection
+from dataclasses import dataclass, field
+
+import rl.utils.io
+from rl.utils import LOGGER
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from worldle.db.models import Country, CountryDifficultyRollup
+from worldle.utils.cache import CountryDataCache, TTLCache
+
+# Secret salt for the daily schedule, so upcoming answers can't be derived from
+# the public source. Daily games are refused until it is set.
+_DAILY_SEED = rl.utils.io.getenv("WORLDLE_DAILY_SEED", "")
+if not _DAILY_SEED:
+    LOGGER.warning("WORLDLE_DAILY_SEED is not set, so daily games are disabled")
+# "uniform", or "difficulty" to favor answers that players solve more often
+_ANSWER_WEIGHTING = rl.utils.io.getenv("WORLDLE_ANSWER_WEIGHTING", "uniform")
+
+
+def daily_mode_enabled() -> bool:
+    return bool(_DAILY_SEED)
+
+
+@dataclass(frozen=True)
+class AnswerPool:
+    """The countries that can be answers, with their sampling weights."""
+
+    country_ids: tuple[int, ...]
+    weights: tuple[float, ...]
+    _daily_answers: dict[datetime.date, int] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def sample(self, exclude: Collection[int] = ()) -> int:
+        candidates = [
+            (country_id, weight)
+            for country_id, weight in zip(self.country_ids, self.weights, strict=True)
+            if country_id not in exclude and weight > 0
+        ]
+        if not candidates:
+            # Every answer was excluded (e.g. a very small pool), so allow repeats
+            candidates = list(zip(self.country_ids, self.weights, strict=True))
+        country_ids, weights = zip(*candidates, strict=True)
+        return random.choices(country_ids, weights=weights)[0]
+
+    def daily_answer(self, date: datetime.date) -> int:
+        """The answer everyone gets on ``date``.
+
+        Each country gets a seeded score for the day and the lowest score wins.
+        Scores depend only on the day and the country's id, so adding or removing
+        a country only changes the days that country wins, and workers whose
+        pools differ during a refresh agree on every other day.
+        """
+        if not _DAILY_SEED:
+            raise ValueError("WORLDLE_DAILY_SEED must be set for daily answers")
+        if date not in self._daily_answers:
+            self._daily_answers[date] = min(
+                self.country_ids,
+                key=lambda country_id: hashlib.blake2b(
+                    f"{_DAILY_SEED}:{date.isoformat()}:{country_id}".encode(),
+                    digest_size=8,
+                ).digest(),
+            )
+        return self._daily_answers[date]
+
+
+def load_answer_pool(session: Session) -> AnswerPool:
+    country_ids = tuple(
+        session.scalars(
+            select(Country.id)
+            .where(Country.svg_bucket_path.isnot(None))
+            # Guesses are scored by distance to the answer, which needs its location
+            .where(Country.geo_point.isnot(None))
+            .order_by(Country.id)
+        ).all()
+    )
+    return AnswerPool(country_ids=country_ids, weights=(1.0,) * len(country_ids))
+
+
+def load_difficulty_weights(
+    session: Session, country_ids: tuple[int, ...]
+) -> tuple[float, ...]:
+    win_counts = {
+        country_id: (num_won, num_finished)
+        for country_id, num_won, num_finished in session.execute(
+            select(
+                CountryDifficultyRollup.country_id,
+                CountryDifficultyRollup.num_won,
+                CountryDifficultyRollup.num_finished,
+            )
+        )
+    }
+    # Smoothed win rate, so countries with few games stay close to 50%
+    return tuple(
+        (win_counts.get(country_id, (0, 0))[0] + 1)
+        / (win_counts.get(country_id, (0, 0))[1] + 2)
+        for country_id in country_ids
+    )
+
+
+_ANSWER_POOL = CountryDataCache(load_answer_pool)
+# The difficulty rollup changes as games finish, not with the countries table, so
+# weighted pools expire on their own schedule. Keyed by the pool's countries.
+_WEIGHTED_ANSWER_POOL: TTLCache[tuple[int, ...], AnswerPool] = TTLCache(
+    maxsize=1,
+    ttl=float(rl.utils.io.getenv("WORLDLE_ANSWER_WEIGHTS_TTL", "300")),
+)
+
+
+def get_answer_pool(session: Session) -> AnswerPool:
+    pool = _ANSWER_POOL.get()
+    if _ANSWER_WEIGHTING != "difficulty":
+        return pool
+    weighted_pool = _WEIGHTED_ANSWER_POOL.get(pool.country_ids)
+    if weighted_pool is None:
+        weighted_pool = AnswerPool(
+            country_ids=pool.country_ids,
+            weights=load_difficulty_weights(session, pool.country_ids),
+        )
+        _WEIGHTED_ANSWER_POOL.set(pool.country_ids, weighted_pool)
+    return weighted_pool
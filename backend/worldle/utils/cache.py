@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+import rl.utils.io
+from rl.utils import LOGGER
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from worldle.db.models import Country
+from worldle.db.session import get_session
+from worldle.utils.metrics import COUNTRY_DATA_CACHE_LOOKUPS
+from worldle.utils.snapshot import Snapshot, get_snapshot
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+# How often (in seconds) a cache checks whether the countries table has changed
+COUNTRY_DATA_CHECK_INTERVAL = float(
+    rl.utils.io.getenv("WORLDLE_COUNTRY_DATA_CHECK_INTERVAL", "60")
+)
+
+
+def get_countries_version(session: Session) -> str:
+    """A cheap fingerprint of the countries table that changes on ingest/SVG runs."""
+    num_countries, last_updated_at = session.execute(
+        select(func.count(Country.id), func.max(Country.updated_at))
+    ).one()
+    return f"{num_countries}:{last_updated_at.isoformat() if last_updated_at else ''}"
+
+
+class _CountriesVersionTracker:
+    """The countries version, checked at most every ``check_interval`` seconds.
+
+    Every CountryDataCache compares itself against this one shared version, so
+    they all move to a new version together and one check serves all of them.
+    """
+
+    def __init__(self, check_interval: float = COUNTRY_DATA_CHECK_INTERVAL):
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._snapshot: Snapshot | None = None
+        self._checked_at = 0.0
+
+    def get(self) -> tuple[str, Snapshot | None, bool]:
+        """The current version, the published snapshot if it is of that version,
+        and whether the database was checked by this call."""
+        if (
+            self._version is not None
+            and time.monotonic() - self._checked_at < self._check_interval
+        ):
+            return self._version, self._snapshot, False
+        with self._lock:
+            if (
+                self._version is not None
+                and time.monotonic() - self._checked_at < self._check_interval
+            ):
+                return self._version, self._snapshot, False
+            with get_session() as session:
+                version = get_countries_version(session)
+            snapshot = get_snapshot()
+            if snapshot is not None and snapshot.version != version:
+                LOGGER.warning(
+                    "Snapshot %s is of countries version %s, not %s; loading "
+                    "country data from the database until it is republished",
+                    snapshot.path,
+                    snapshot.version,
+                    version,
+                )
+                snapshot = None
+            self._version, self._snapshot = version, snapshot
+            self._checked_at = time.monotonic()
+            return version, snapshot, True
+
+
+_COUNTRIES_VERSION = _CountriesVersionTracker()
+
+
+class CountryDataCache(Generic[T]):
+    """A per-process value derived from the countries table.
+
+    The value is built on first use and rebuilt once the countries version changes,
+    which is checked at most every COUNTRY_DATA_CHECK_INTERVAL seconds for all
+    caches at once. Lookups are counted in COUNTRY_DATA_CACHE_LOOKUPS under
+    ``name`` (the build function's by default).
+
+    With ``from_snapshot`` and a published snapshot (see worldle.utils.snapshot)
+    of the current version, the value is loaded from the snapshot instead. A
+    snapshot that is behind the database is ignored, so every cache always
+    reflects the same countries. ``get(force=True)`` always rebuilds from the
+    database.
+
+    After enable_background_refresh(), a loaded value is returned as is, even with
+    ``force``, and refresh_country_data() does the checks and rebuilds instead.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Session], T],
+        name: str | None = None,
+        from_snapshot: Callable[[Snapshot], T] | None = None,
+    ):
+        self._build = build
+        self._from_snapshot = from_snapshot
+        self.name = name = name or build.__name__
+        self._hits = COUNTRY_DATA_CACHE_LOOKUPS.labels(cache=name, result="hit")
+        self._checks = COUNTRY_DATA_CACHE_LOOKUPS.labels(cache=name, result="check")
+        self._rebuilds = COUNTRY_DATA_CACHE_LOOKUPS.labels(cache=name, result="rebuild")
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._version: str | None = None
+        self._snapshot: Snapshot | None = None
+        _COUNTRY_DATA_CACHES.append(self)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._value is not None
+
+    @property
+    def version(self) -> str | None:
+        """The countries version the current value was built from."""
+        return self._version
+
+    def _is_current(self, version: str, snapshot: Snapshot | None) -> bool:
+        # A value built from the database is replaced once a snapshot of the same
+        # version is published, so that the workers share it again
+        return (
+            self._value is not None
+            and self._version == version
+            and (self._from_snapshot is None or self._snapshot is snapshot)
+        )
+
+    def get(self, force: bool = False) -> T:
+        if _background_refresh and self._value is not None:
+            self._hits.inc()
+            return self._value
+        return self.refresh(force)
+
+    def refresh(self, force: bool = False) -> T:
+        """Check the countries version if it's due, and rebuild the value if behind."""
+        version, snapshot, checked = _COUNTRIES_VERSION.get()
+        if not force and self._is_current(version, snapshot):
+            (self._checks if checked else self._hits).inc()
+            return self._value
+
+        with self._lock:
+            if not force and self._is_current(version, snapshot):
+                self._hits.inc()
+                return self._value
+            if self._from_snapshot and snapshot is not None and not force:
+                self._value = self._from_snapshot(snapshot)
+                self._snapshot = snapshot
+            else:
+                with get_session() as session:
+                    self._value = self._build(session)
+                self._snapshot = None
+            self._version = version
+            self._rebuilds.inc()
+            return self._value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._snapshot = None
+
+
+# Every CountryDataCache created so far, for warming them up and reporting readiness
+_COUNTRY_DATA_CACHES: list[CountryDataCache] = []
+
+
+def get_country_data_caches() -> list[CountryDataCache]:
+    return list(_COUNTRY_DATA_CACHES)
+
+
+# Whether lookups leave checking and rebuilding to refresh_country_data
+_background_refresh = False
+
+
+def enable_background_refresh() -> None:
+    """Make CountryDataCache.get() never block once a value is loaded.
+
+    For the async handlers, which reach the caches on the event loop: a version
+    check is a query on the sync engine, and a rebuild (e.g. compressing every
+    catalog body) can take most of a second, which would stall every request on
+    the worker. refresh_country_data() must then be run periodically off the loop.
+    """
+    global _background_refresh
+    _background_refresh = True
+
+
+def refresh_country_data() -> None:
+    """Check the countries version and rebuild every loaded cache that is behind.
+
+    Lookups keep getting the previous values until each rebuild finishes.
+    """
+    for cache in get_country_data_caches():
+        if cache.is_loaded:
+            cache.refresh()
+
+
+class TTLCache(Generic[K, T]):
+    """A thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: K, default: T | None = None) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: T, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self._ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,151 @@
+import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from worldle.db.models import (
+    CountryDifficultyRollup,
+    CountryFirstGuessRollup,
+    Game,
+    GameStatus,
+    Guess,
+    RollupWatermark,
+)
+
+_ROLLUP_NAME = "country_difficulty"
+
+
+class CountryDifficulty(BaseModel):
+    country_id: int
+    num_finished: int
+    win_rate: float
+    mean_guesses_to_solve: float | None
+    most_common_wrong_first_guess_id: int | None
+
+
+def refresh_country_difficulty(
+    session: Session, lag: datetime.timedelta, full: bool = False
+) -> int:
+    """Fold games finished since the last refresh into the difficulty rollups.
+
+    Only games whose ``updated_at`` is at least ``lag`` old are folded in, so that
+    transactions still in flight when the watermark advances aren't skipped.
+    Won and lost games are never updated again, so each is counted exactly once.
+    Returns the number of games folded in.
+    """
+    watermark = session.get(RollupWatermark, _ROLLUP_NAME, with_for_update=True)
+    if full:
+        session.execute(delete(CountryFirstGuessRollup))
+        session.execute(delete(CountryDifficultyRollup))
+    since = datetime.datetime.min if full or not watermark else watermark.watermark
+    until = session.scalar(select(func.localtimestamp())) - lag
+
+    num_guesses = (
+        select(func.count(Guess.id)).where(Guess.game_id == Game.id).scalar_subquery()
+    )
+    finished = (
+        select(
+            Game.id,
+            Game.answer_country_id,
+            Game.status,
+            num_guesses.label("num_guesses"),
+        )
+        .where(Game.status.in_([GameStatus.WON, GameStatus.LOST]))
+        .where(Game.updated_at > since)
+        .where(Game.updated_at <= until)
+        .subquery()
+    )
+    is_won = finished.c.status == GameStatus.WON
+
+    totals = insert(CountryDifficultyRollup).from_select(
+        ["country_id", "num_finished", "num_won", "total_won_guesses"],
+        select(
+            finished.c.answer_country_id,
+            func.count(),
+            func.count().filter(is_won),
+            func.coalesce(func.sum(finished.c.num_guesses).filter(is_won), 0),
+        ).group_by(finished.c.answer_country_id),
+    )
+    session.execute(
+        totals.on_conflict_do_update(
+            index_elements=[CountryDifficultyRollup.country_id],
+            set_={
+                "num_finished": CountryDifficultyRollup.num_finished
+                + totals.excluded.num_finished,
+                "num_won": CountryDifficultyRollup.num_won + totals.excluded.num_won,
+                "total_won_guesses": CountryDifficultyRollup.total_won_guesses
+                + totals.excluded.total_won_guesses,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+    first_guesses = insert(CountryFirstGuessRollup).from_select(
+        ["answer_country_id", "guessed_country_id", "num_guesses"],
+        select(finished.c.answer_country_id, Guess.guessed_country_id, func.count())
+        .join(Guess, and_(Guess.game_id == finished.c.id, Guess.index == 0))
+        .where(Guess.guessed_country_id != finished.c.answer_country_id)
+        .group_by(finished.c.answer_country_id, Guess.guessed_country_id),
+    )
+    session.execute(
+        first_guesses.on_conflict_do_update(
+            index_elements=[
+                CountryFirstGuessRollup.answer_country_id,
+                CountryFirstGuessRollup.guessed_country_id,
+            ],
+            set_={
+                "num_guesses": CountryFirstGuessRollup.num_guesses
+                + first_guesses.excluded.num_guesses,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+    num_games = session.scalar(select(func.count()).select_from(finished))
+    set_watermark = insert(RollupWatermark).values(name=_ROLLUP_NAME, watermark=until)
+    session.execute(
+        set_watermark.on_conflict_do_update(
+            index_elements=[RollupWatermark.name],
+            set_={"watermark": until, "updated_at": func.now()},
+        )
+    )
+    session.commit()
+    return num_games
+
+
+def get_country_difficulties(session: Session) -> list[CountryDifficulty]:
+    top_first_guesses = (
+        select(
+            CountryFirstGuessRollup.answer_country_id,
+            CountryFirstGuessRollup.guessed_country_id,
+        )
+        .distinct(CountryFirstGuessRollup.answer_country_id)
+        .order_by(
+            CountryFirstGuessRollup.answer_country_id,
+            CountryFirstGuessRollup.num_guesses.desc(),
+            CountryFirstGuessRollup.guessed_country_id,
+        )
+        .subquery()
+    )
+    rows = session.execute(
+        select(CountryDifficultyRollup, top_first_guesses.c.guessed_country_id)
+        .outerjoin(
+            top_first_guesses,
+            top_first_guesses.c.answer_country_id == CountryDifficultyRollup.country_id,
+        )
+        .order_by(CountryDifficultyRollup.country_id)
+    ).all()
+    return [
+        CountryDifficulty(
+            country_id=rollup.country_id,
+            num_finished=rollup.num_finished,
+            win_rate=rollup.num_won / rollup.num_finished if rollup.num_finished else 0,
+            mean_guesses_to_solve=rollup.total_won_guesses / rollup.num_won
+            if rollup.num_won
+            else None,
+            most_common_wrong_first_guess_id=first_guess_id,
+        )
+        for rollup, first_guess_id in rows
+    ]
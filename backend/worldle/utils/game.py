@@ -19,3 +19,8 @@ class CompassDirection(StrEnum):
     SOUTH_WEST = "SOUTH_WEST"
     WEST = "WEST"
     NORTH_WEST = "NORTH_WEST"
+
+
+class GameMode(StrEnum):
+    RANDOM = "random"
+    DAILY = "daily"
@@ -0,0 +1,157 @@
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from worldle.db.models import Country
+from worldle.utils.cache import CountryDataCache
+from worldle.utils.game import CompassDirection
+from worldle.utils.snapshot import Snapshot, SnapshotWriter
+
+KM_PER_MILE = 1.609344
+EARTH_MAX_DISTANCE_MILES = 12_450  # Max distance between two points on Earth
+
+# Compass directions by 45° sector, counterclockwise from east
+COMPASS_SECTORS = (
+    CompassDirection.EAST,
+    CompassDirection.NORTH_EAST,
+    CompassDirection.NORTH,
+    CompassDirection.NORTH_WEST,
+    CompassDirection.WEST,
+    CompassDirection.SOUTH_WEST,
+    CompassDirection.SOUTH,
+    CompassDirection.SOUTH_EAST,
+)
+
+
+@dataclass(frozen=True)
+class CountryPairMatrix:
+    """Guess metrics for every (guessed country, answer country) pair.
+
+    Each array is N×N, where row i / column j correspond to the country ids at
+    ``country_ids[i]`` / ``country_ids[j]``.
+    """
+
+    country_ids: np.ndarray
+    index: dict[int, int]
+    km: np.ndarray
+    bearing: np.ndarray
+    compass: np.ndarray
+    proximity: np.ndarray
+
+    def __contains__(self, country_id: int) -> bool:
+        return country_id in self.index
+
+    def _pair(self, from_country_id: int, to_country_id: int) -> tuple[int, int]:
+        return self.index[from_country_id], self.index[to_country_id]
+
+    def distance_km(self, from_country_id: int, to_country_id: int) -> float:
+        return float(self.km[self._pair(from_country_id, to_country_id)])
+
+    def distance_miles(self, from_country_id: int, to_country_id: int) -> float:
+        return self.distance_km(from_country_id, to_country_id) / KM_PER_MILE
+
+    def bearing_degrees(self, from_country_id: int, to_country_id: int) -> float:
+        return float(self.bearing[self._pair(from_country_id, to_country_id)])
+
+    def compass_direction(
+        self, from_country_id: int, to_country_id: int
+    ) -> CompassDirection:
+        return COMPASS_SECTORS[self.compass[self._pair(from_country_id, to_country_id)]]
+
+    def proximity_prop(self, from_country_id: int, to_country_id: int) -> float:
+        return float(self.proximity[self._pair(from_country_id, to_country_id)])
+
+
+def build_pair_matrix(
+    country_ids: np.ndarray, lons: np.ndarray, lats: np.ndarray
+) -> CountryPairMatrix:
+    # Only needed to build the matrix, which workers reading a snapshot skip
+    from pyproj import Geod
+
+    n = len(country_ids)
+    from_idx, to_idx = np.triu_indices(n, k=1)
+
+    # Geodesic distance on the WGS-84 ellipsoid (the same model geopy uses)
+    _, _, meters = Geod(ellps="WGS84").inv(
+        lons[from_idx], lats[from_idx], lons[to_idx], lats[to_idx]
+    )
+    km = np.zeros((n, n))
+    km[from_idx, to_idx] = meters / 1000
+    km[to_idx, from_idx] = meters / 1000
+
+    # Angle on a plate carrée projection, with 0° pointing east
+    dx = lons[np.newaxis, :] - lons[:, np.newaxis]
+    dy = lats[np.newaxis, :] - lats[:, np.newaxis]
+    bearing = np.mod(np.degrees(np.arctan2(dy, dx)), 360)
+    compass = (np.mod(bearing + 22.5, 360) // 45).astype(np.int8)
+
+    proximity = 1 - np.minimum(km / KM_PER_MILE / EARTH_MAX_DISTANCE_MILES, 1)
+
+    return CountryPairMatrix(
+        country_ids=country_ids,
+        index={int(country_id): i for i, country_id in enumerate(country_ids)},
+        km=km,
+        bearing=bearing,
+        compass=compass,
+        proximity=proximity,
+    )
+
+
+def load_pair_matrix(session: Session) -> CountryPairMatrix:
+    rows = session.execute(
+        select(Country.id, func.ST_X(Country.geo_point), func.ST_Y(Country.geo_point))
+        .where(Country.geo_point.isnot(None))
+        .order_by(Country.id)
+    ).all()
+    return build_pair_matrix(
+        np.array([country_id for country_id, _, _ in rows], dtype=np.int64),
+        np.array([lon for _, lon, _ in rows], dtype=float),
+        np.array([lat for _, _, lat in rows], dtype=float),
+    )
+
+
+_PAIR_MATRIX_ARRAYS = ("country_ids", "km", "bearing", "compass", "proximity")
+
+
+def write_pair_matrix(matrix: CountryPairMatrix, writer: SnapshotWriter) -> None:
+    for name in _PAIR_MATRIX_ARRAYS:
+        writer.add_array(f"pair_matrix.{name}", getattr(matrix, name))
+
+
+def read_pair_matrix(snapshot: Snapshot) -> CountryPairMatrix:
+    arrays = {
+        name: snapshot.array(f"pair_matrix.{name}") for name in _PAIR_MATRIX_ARRAYS
+    }
+    return CountryPairMatrix(
+        index={
+            int(country_id): i for i, country_id in enumerate(arrays["country_ids"])
+        },
+        **arrays,
+    )
+
+
+_PAIR_MATRIX = CountryDataCache(load_pair_matrix, from_snapshot=read_pair_matrix)
+
+
+# The countries version the matrix was last rebuilt for because a country was missing
+_rebuilt_for_version: str | None = None
+
+
+def get_pair_matrix(*country_ids: int) -> CountryPairMatrix:
+    """Return this process's pair matrix, which should contain ``country_ids``.
+
+    A missing country triggers a rebuild from the database at most once per
+    countries version, since a country without a geo_point stays missing. Callers
+    must still check that the countries they need are in the matrix.
+    """
+    global _rebuilt_for_version
+    matrix = _PAIR_MATRIX.get()
+    if (
+        any(country_id not in matrix for country_id in country_ids)
+        and _PAIR_MATRIX.version != _rebuilt_for_version
+    ):
+        matrix = _PAIR_MATRIX.get(force=True)
+        _rebuilt_for_version = _PAIR_MATRIX.version
+    return matrix
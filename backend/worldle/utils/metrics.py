@@ -0,0 +1,57 @@
+# Prometheus metrics shared across the app. With PROMETHEUS_MULTIPROC_DIR set (as
+# under gunicorn, see worldle.api.gunicorn_conf), each worker writes its values
+# there and /metrics aggregates them.
+
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "worldle_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "worldle_http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "worldle_http_response_size_bytes",
+    "HTTP response body size by route",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000),
+)
+SQL_STATEMENTS = Histogram(
+    "worldle_sql_statements_per_request",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21),
+)
+SQL_DURATION = Histogram(
+    "worldle_sql_duration_seconds_per_request",
+    "Time spent executing SQL per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "worldle_db_pool_connections",
+    "Database pool connections by state, summed over workers",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITS = Counter(
+    "worldle_db_pool_waits",
+    "Checkouts that had to wait for a pooled connection",
+)
+DB_POOL_WAIT_SECONDS = Counter(
+    "worldle_db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+)
+
+COUNTRY_DATA_CACHE_LOOKUPS = Counter(
+    "worldle_country_data_cache_lookups",
+    "Country data cache lookups by result (hit, check or rebuild)",
+    ["cache", "result"],
+)
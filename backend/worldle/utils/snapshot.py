@@ -0,0 +1,123 @@
+# A read-only snapshot of data derived from the countries table, shared by every
+# worker through the page cache instead of being rebuilt in each one. A snapshot is
+# a directory of .npy arrays, one file of concatenated bodies and a manifest, and
+# WORLDLE_SNAPSHOT_DIR/current is a symlink to the published one.
+
+import datetime
+import json
+import mmap
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import rl.utils.io
+
+# Where snapshots are published; unset serves everything from the database
+SNAPSHOT_DIR = rl.utils.io.getenv("WORLDLE_SNAPSHOT_DIR", "")
+_CURRENT = "current"
+_MANIFEST = "manifest.json"
+_BODIES = "bodies.bin"
+# Published snapshots to keep besides the current one, for workers still using them
+_KEEP_PREVIOUS = 1
+
+
+class Snapshot:
+    """A published snapshot, with its arrays and bodies memory-mapped."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        manifest = json.loads((path / _MANIFEST).read_text())
+        self.version: str = manifest["version"]
+        self.meta: dict[str, Any] = manifest["meta"]
+        self._spans: dict[str, tuple[int, int]] = manifest["bodies"]
+        with (path / _BODIES).open("rb") as f:
+            # An empty file can't be mapped
+            self._bodies = (
+                memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                if os.fstat(f.fileno()).st_size
+                else memoryview(b"")
+            )
+
+    def array(self, name: str) -> np.ndarray:
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    def body(self, name: str) -> memoryview:
+        offset, length = self._spans[name]
+        return self._bodies[offset : offset + length]
+
+
+class SnapshotWriter:
+    """Writes a snapshot to a staging directory and publishes it atomically.
+
+    Workers only ever follow the ``current`` symlink, which is swapped with
+    os.replace, so they see either the old snapshot or the complete new one.
+    """
+
+    def __init__(self, version: str, root: str | Path = SNAPSHOT_DIR):
+        self.root = Path(root)
+        self.version = version
+        self.meta: dict[str, Any] = {}
+        self.name = (
+            f"{datetime.datetime.now(datetime.UTC):%Y%m%dT%H%M%S%f}-{os.getpid()}"
+        )
+        self._staging = self.root / f".{self.name}.tmp"
+        self._staging.mkdir(parents=True)
+        self._bodies = (self._staging / _BODIES).open("wb")
+        self._spans: dict[str, tuple[int, int]] = {}
+
+    def add_array(self, name: str, array: np.ndarray) -> None:
+        np.save(self._staging / f"{name}.npy", np.ascontiguousarray(array))
+
+    def add_body(self, name: str, content: bytes | memoryview) -> None:
+        self._spans[name] = (self._bodies.tell(), len(content))
+        self._bodies.write(content)
+
+    def publish(self) -> Path:
+        self._bodies.close()
+        (self._staging / _MANIFEST).write_text(
+            json.dumps(
+                {"version": self.version, "meta": self.meta, "bodies": self._spans}
+            )
+        )
+        path = self.root / self.name
+        self._staging.rename(path)
+        link = self.root / f".{_CURRENT}.{self.name}.tmp"
+        link.symlink_to(self.name)
+        link.replace(self.root / _CURRENT)
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        published = sorted(
+            p
+            for p in self.root.iterdir()
+            if p.is_dir() and not p.is_symlink() and not p.name.startswith(".")
+        )
+        for path in published[: -(_KEEP_PREVIOUS + 1)]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_snapshot: Snapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> Snapshot | None:
+    """This process's view of the current snapshot, if snapshots are enabled.
+
+    The symlink is re-read on every call, so callers should throttle how often
+    they check (as worldle.utils.cache does).
+    """
+    global _snapshot
+    if not SNAPSHOT_DIR:
+        return None
+    try:
+        target = (Path(SNAPSHOT_DIR) / _CURRENT).readlink().name
+    except FileNotFoundError:
+        return None
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.path.name != target:
+            _snapshot = Snapshot(Path(SNAPSHOT_DIR) / target)
+        return _snapshot
@@ -1,8 +1,12 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+
 from pydantic import BaseModel, Field, computed_field
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from worldle.db.models import Game, GameStatus
+from worldle.db.models import Game, GameStatus, Guess, UserClientStats
 from worldle.utils.game import MAX_GUESSES
 
 
@@ -20,45 +24,99 @@ class UserStats(BaseModel):
         return self.num_won / self.num_played if self.num_played > 0 else 0
 
 
-def get_user_stats(user_client_id: int, session: Session) -> UserStats:
-    games = (
-        session.execute(
-            select(Game)
-            .where(Game.user_client_id == user_client_id)
-            .where(Game.guesses.any())
-        )
-        .unique()
-        .scalars()
-        .all()
-    )
-
-    stats = UserStats()
-    stats.num_played = len([g for g in games if g.status != GameStatus.IN_PROGRESS])
-    stats.num_won = len([g for g in games if g.status == GameStatus.WON])
-
-    # Calculate streaks
-    current_streak = 0
-    max_streak = 0
+class GameOutcome(NamedTuple):
+    status: GameStatus
+    num_guesses: int
 
-    sorted_games = sorted(games, key=lambda g: g.created_at, reverse=True)
-    if sorted_games and sorted_games[0].status == GameStatus.IN_PROGRESS:
-        # Don't zero out the current streak just because the user is in progress
-        sorted_games.pop(0)
 
-    for game in sorted_games:
-        if game.status == GameStatus.WON:
+def compute_user_stats(outcomes: Iterable[GameOutcome]) -> UserStats:
+    """Compute stats from a user's games (with at least one guess), oldest first."""
+    # Counted in locals and validated once, since setting attributes on the model
+    # per game dominated the time for long histories
+    num_played = num_won = current_streak = max_streak = 0
+    guess_counts = [0] * MAX_GUESSES
+    for status, num_guesses in outcomes:
+        # An in-progress game neither counts as played nor breaks the streak
+        if status == GameStatus.IN_PROGRESS:
+            continue
+        num_played += 1
+        if status == GameStatus.WON:
+            num_won += 1
             current_streak += 1
-            max_streak = max(max_streak, current_streak)
+            if current_streak > max_streak:
+                max_streak = current_streak
+            guess_counts[num_guesses - 1] += 1
         else:
             current_streak = 0
-            break
+    return UserStats(
+        num_played=num_played,
+        num_won=num_won,
+        current_streak=current_streak,
+        max_streak=max_streak,
+        guess_distribution={i + 1: count for i, count in enumerate(guess_counts)},
+    )
+
 
-    stats.current_streak = current_streak
-    stats.max_streak = max_streak
+def get_game_outcomes(user_client_id: int, session: Session) -> list[GameOutcome]:
+    rows = session.execute(
+        select(Game.status, func.count(Guess.id))
+        .join(Guess, Guess.game_id == Game.id)
+        .where(Game.user_client_id == user_client_id)
+        .group_by(Game.id)
+        .order_by(Game.created_at.asc())
+    ).all()
+    return [
+        GameOutcome(GameStatus(status), num_guesses) for status, num_guesses in rows
+    ]
 
-    # Calculate guess distribution
-    for game in games:
-        if game.status == GameStatus.WON:
-            stats.guess_distribution[len(game.guesses)] += 1
 
-    return stats
+def _stats_from_row(row: UserClientStats) -> UserStats:
+    return UserStats(
+        num_played=row.num_played,
+        num_won=row.num_won,
+        current_streak=row.current_streak,
+        max_streak=row.max_streak,
+        guess_distribution={
+            i + 1: count for i, count in enumerate(row.guess_distribution)
+        },
+    )
+
+
+def stats_row_values(user_client_id: int, stats: UserStats) -> dict:
+    return {
+        "user_client_id": user_client_id,
+        "num_played": stats.num_played,
+        "num_won": stats.num_won,
+        "current_streak": stats.current_streak,
+        "max_streak": stats.max_streak,
+        "guess_distribution": [
+            stats.guess_distribution[i + 1] for i in range(MAX_GUESSES)
+        ],
+    }
+
+
+def get_user_stats(user_client_id: int, session: Session) -> UserStats:
+    row = session.get(UserClientStats, user_client_id)
+    if row:
+        return _stats_from_row(row)
+    # Users who haven't finished a game since user_stats was added have no row
+    # yet, so fall back to their history
+    return compute_user_stats(get_game_outcomes(user_client_id, session))
+
+
+def lock_user_stats(user_client_id: int, session: Session) -> UserClientStats:
+    """Lock (creating it from history if needed) a user's stats row for an update.
+
+    Call this before changing the status of the game being recorded, so that a
+    newly created row doesn't already include it.
+    """
+    row = session.get(UserClientStats, user_client_id, with_for_update=True)
+    if row:
+        return row
+    stats = compute_user_stats(get_game_outcomes(user_client_id, session))
+    session.execute(
+        insert(UserClientStats)
+        .values(**stats_row_values(user_client_id, stats))
+        .on_conflict_do_nothing()
+    )
+    return session.get(UserClientStats, user_client_id, with_for_update=True)
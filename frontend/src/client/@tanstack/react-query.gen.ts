@@ -8,6 +8,9 @@ import type {
   CreateGameData,
   CreateGameError,
   CreateGameResponse,
+  CreateGuessBatchData,
+  CreateGuessBatchError,
+  CreateGuessBatchResponse,
   CreateGuessData,
   CreateGuessError,
   CreateGuessResponse,
@@ -92,6 +95,25 @@ export const readCountryOptions = (options: Options<ReadCountryData>) => {
   });
 };
 
+export const listCountryDifficultyQueryKey = (options?: Options) => [
+  createQueryKey("listCountryDifficulty", options),
+];
+
+export const listCountryDifficultyOptions = (options?: Options) => {
+  return queryOptions({
+    queryFn: async ({ queryKey, signal }) => {
+      const { data } = await DefaultService.listCountryDifficulty({
+        ...options,
+        ...queryKey[0],
+        signal,
+        throwOnError: true,
+      });
+      return data;
+    },
+    queryKey: listCountryDifficultyQueryKey(options),
+  });
+};
+
 export const createUserClientQueryKey = (options?: Options) => [
   createQueryKey("createUserClient", options),
 ];
@@ -284,3 +306,44 @@ export const createGuessMutation = (
   };
   return mutationOptions;
 };
+
+export const createGuessBatchQueryKey = (
+  options: Options<CreateGuessBatchData>,
+) => [createQueryKey("createGuessBatch", options)];
+
+export const createGuessBatchOptions = (
+  options: Options<CreateGuessBatchData>,
+) => {
+  return queryOptions({
+    queryFn: async ({ queryKey, signal }) => {
+      const { data } = await DefaultService.createGuessBatch({
+        ...options,
+        ...queryKey[0],
+        signal,
+        throwOnError: true,
+      });
+      return data;
+    },
+    queryKey: createGuessBatchQueryKey(options),
+  });
+};
+
+export const createGuessBatchMutation = (
+  options?: Partial<Options<CreateGuessBatchData>>,
+) => {
+  const mutationOptions: UseMutationOptions<
+    CreateGuessBatchResponse,
+    CreateGuessBatchError,
+    Options<CreateGuessBatchData>
+  > = {
+    mutationFn: async (localOptions) => {
+      const { data } = await DefaultService.createGuessBatch({
+        ...options,
+        ...localOptions,
+        throwOnError: true,
+      });
+      return data;
+    },
+  };
+  return mutationOptions;
+};
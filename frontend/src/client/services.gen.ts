@@ -9,6 +9,9 @@ import type {
   CreateGameData,
   CreateGameError,
   CreateGameResponse,
+  CreateGuessBatchData,
+  CreateGuessBatchError,
+  CreateGuessBatchResponse,
   CreateGuessData,
   CreateGuessError,
   CreateGuessResponse,
@@ -16,6 +19,8 @@ import type {
   CreateUserClientResponse,
   ListCountriesError,
   ListCountriesResponse,
+  ListCountryDifficultyError,
+  ListCountryDifficultyResponse,
   ReadCountryData,
   ReadCountryError,
   ReadCountryResponse,
@@ -68,6 +73,22 @@ export class DefaultService {
     });
   }
 
+  /**
+   * List Country Difficulty
+   */
+  public static listCountryDifficulty<ThrowOnError extends boolean = false>(
+    options?: Options<unknown, ThrowOnError>,
+  ) {
+    return (options?.client ?? client).get<
+      ListCountryDifficultyResponse,
+      ListCountryDifficultyError,
+      ThrowOnError
+    >({
+      ...options,
+      url: "/country_difficulty",
+    });
+  }
+
   /**
    * Create User Client
    */
@@ -179,4 +200,20 @@ export class DefaultService {
       url: "/games/{game_id}/guesses",
     });
   }
+
+  /**
+   * Create Guess Batch
+   */
+  public static createGuessBatch<ThrowOnError extends boolean = false>(
+    options: Options<CreateGuessBatchData, ThrowOnError>,
+  ) {
+    return (options?.client ?? client).post<
+      CreateGuessBatchResponse,
+      CreateGuessBatchError,
+      ThrowOnError
+    >({
+      ...options,
+      url: "/games/{game_id}/guesses/batch",
+    });
+  }
 }
@@ -21,6 +21,14 @@ export const CompassDirection = {
   NORTH_WEST: "NORTH_WEST",
 } as const;
 
+export type CountryDifficulty = {
+  country_id: number;
+  num_finished: number;
+  win_rate: number;
+  mean_guesses_to_solve: number | null;
+  most_common_wrong_first_guess_id: number | null;
+};
+
 export type CountryItem = {
   id: number;
   name: string;
@@ -47,8 +55,16 @@ export type CountryRead = {
 
 export type GameCreate = {
   user_client_uuid: string;
+  mode?: GameMode;
 };
 
+export type GameMode = "random" | "daily";
+
+export const GameMode = {
+  RANDOM: "random",
+  DAILY: "daily",
+} as const;
+
 export type GameRead = {
   id: number;
   user_client_id: number;
@@ -67,6 +83,11 @@ export const GameStatus = {
   LOST: "lost",
 } as const;
 
+export type GuessBatchCreate = {
+  guessed_country_ids: Array<number>;
+  start_index?: number | null;
+};
+
 export type GuessCreate = {
   guessed_country_id: number;
 };
@@ -137,6 +158,10 @@ export type ReadCountryResponse = CountryRead;
 
 export type ReadCountryError = HTTPValidationError;
 
+export type ListCountryDifficultyResponse = Array<CountryDifficulty>;
+
+export type ListCountryDifficultyError = unknown;
+
 export type CreateUserClientResponse = UserClientRead;
 
 export type CreateUserClientError = unknown;
@@ -173,6 +198,9 @@ export type ReadUserStatsError = HTTPValidationError;
 
 export type CreateGameData = {
   body: GameCreate;
+  headers?: {
+    "x-worldle-user-client-uuid"?: string | null;
+  };
 };
 
 export type CreateGameResponse = GameRead;
@@ -180,6 +208,9 @@ export type CreateGameResponse = GameRead;
 export type CreateGameError = HTTPValidationError;
 
 export type ReadGameData = {
+  headers?: {
+    "x-worldle-user-client-uuid"?: string | null;
+  };
   path: {
     game_id: number;
   };
@@ -191,6 +222,9 @@ export type ReadGameError = HTTPValidationError;
 
 export type CreateGuessData = {
   body: GuessCreate;
+  headers?: {
+    "x-worldle-user-client-uuid"?: string | null;
+  };
   path: {
     game_id: number;
   };
@@ -199,3 +233,17 @@ export type CreateGuessData = {
 export type CreateGuessResponse = GuessRead;
 
 export type CreateGuessError = HTTPValidationError;
+
+export type CreateGuessBatchData = {
+  body: GuessBatchCreate;
+  headers?: {
+    "x-worldle-user-client-uuid"?: string | null;
+  };
+  path: {
+    game_id: number;
+  };
+};
+
+export type CreateGuessBatchResponse = GameRead;
+
+export type CreateGuessBatchError = HTTPValidationError;
@@ -5,8 +5,13 @@ import { Clipboard, InfoCircle } from "react-bootstrap-icons";
 import { DistanceUnit, useSettings } from "../contexts/SettingsContext";
 import { useUser } from "../contexts/UserContext";
 
-const UUID_REGEX =
-  /^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$/i;
+const UUID_PATTERN =
+  "[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}";
+// Either a bare uuid or a signed "kid.id.uuid.signature" token
+const UUID_REGEX = new RegExp(
+  `^(${UUID_PATTERN}|[^.\\s]+\\.\\d+\\.${UUID_PATTERN}\\.[\\w-]+)$`,
+  "i",
+);
 
 const SettingsPane: React.FC = () => {
   const { distanceUnit, setDistanceUnit } = useSettings();
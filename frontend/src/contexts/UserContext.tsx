@@ -63,6 +63,10 @@ export const UserProvider: React.FC<{
         path: { user_client_uuid: storedUuid },
       });
       if (userClient != null) {
+        // Bare uuids are upgraded to signed tokens by the server
+        if (userClient.uuid !== storedUuid) {
+          localStorage.setItem(USER_UUID_KEY, userClient.uuid);
+        }
         queryClient.prefetchQuery({
           ...readUserStatsOptions({
             path: { user_client_uuid: userClient.uuid },